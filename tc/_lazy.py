@@ -0,0 +1,46 @@
+''' Lazy loading of the names exported by a package (PEP 562).
+
+    A package lists its exports much like it would import them:
+
+        __getattr__, __dir__, __all__ = lazy_exports(globals(), {
+            '.format': ['print_dict', 'shorten as shorten_string'],
+        })
+
+    and each submodule is only imported the first time one of its names is
+    used, so importing the package itself is nearly free, and submodules
+    that need unavailable dependencies (such as pywin32 outside Windows)
+    only fail when they are actually used.
+'''
+import importlib
+from typing import Any, Callable, Dict, List, Tuple
+
+
+def lazy_exports(
+    namespace: Dict[str, Any],
+    exports: Dict[str, List[str]]
+) -> Tuple[Callable[[str], Any], Callable[[], List[str]], List[str]]:
+    ''' Returns (__getattr__, __dir__, __all__) for the package whose globals
+        are namespace; exports maps a (relative) submodule name to the names
+        it exports, each either 'name' or 'name as alias'. '''
+    package = namespace['__name__']
+    sources: Dict[str, Tuple[str, str]] = {}
+
+    for module_name, names in exports.items():
+        for name in names:
+            attribute, _, alias = name.partition(' as ')
+            sources[alias or attribute] = (module_name, attribute)
+
+    def __getattr__(name: str) -> Any:
+        try:
+            module_name, attribute = sources[name]
+        except KeyError:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}') from None
+
+        value = getattr(importlib.import_module(module_name, package), attribute)
+        namespace[name] = value  # subsequent lookups don't reach __getattr__
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(namespace) | set(sources))
+
+    return __getattr__, __dir__, list(sources)
@@ -1 +1,10 @@
-from .utils import merge, rename
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.utils': ['merge', 'rename'],
+})
+
+if TYPE_CHECKING:
+    from .utils import merge, rename
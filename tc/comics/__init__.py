@@ -1,5 +1,21 @@
 """ The subfiles module provides the ability to iterate through all
     files or folders in a directory and its subdirectories. """
 
-from .comic import Comic, Token, get_info, organize
-from .subcomics import SubcomicSpecification, organize_subcomics, organize_subcomics_with_artists
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.comic': ['Comic', 'Token', 'get_info', 'get_info_many', 'organize', 'plan_organize'],
+    '.subcomics': [
+        'SubcomicSpecification', 'organize_subcomics', 'organize_subcomics_with_artists'
+    ],
+    '.caching': ['InfoCache'],
+    '.similar': ['find_similar', 'SimilarityIndex'],
+})
+
+if TYPE_CHECKING:
+    from .comic import Comic, Token, get_info, get_info_many, organize, plan_organize
+    from .subcomics import SubcomicSpecification, organize_subcomics, organize_subcomics_with_artists
+    from .caching import InfoCache
+    from .similar import find_similar, SimilarityIndex
@@ -0,0 +1,164 @@
+''' Benchmarks for comic name parsing, over a corpus of typical gallery names.
+
+    Usage:
+        >>> from tc.utils import print_dict
+        >>> print_dict(benchmark_pop_tokens())
+        >>> print_dict(benchmark_memory())
+        >>> check_similar()
+'''
+import gc
+import tracemalloc
+import unicodedata
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+from tc.utils.benchmark import time_function
+from .comic import Comic, Token
+from .similar import SimilarityIndex
+
+
+corpus = [
+    '[サークル名 (作者名)] タイトル (オリジナル) [中国翻訳] [DL版]',
+    '(C97) [サークル名 (作者名)] タイトル 2 (東方Project) [中国翻訳]',
+    '(COMIC1☆15) [Circle (Artist)] Title: Subtitle (Series) [English] [Decensored]',
+    '[Artist] Title Vol. 1-3 [Digital]',
+    '【汉化组】[作者] 标题 第1话',
+    '{Magazine 2020-01} [作者] タイトル (COMIC 雑誌 2020年1月号)',
+    '[作者] タイトル 【無修正】',
+    '(例大祭16) [サークル (作者)] タイトル (東方Project) [空気系☆漢化]',
+    '[Circle] Title (Original)',
+    'Title without any tags',
+    '   [Padded] Title with spaces   (Series)   ',
+    '[Artist] Title [Chinese] [某汉化组] [Digital] [Ongoing]',
+    '(C95) [サークル (作者A, 作者B)] タイトル(1) (アイドルマスター シンデレラガールズ)',
+    '[作者] タイトル (COMIC 快楽天 2019年12月号) [中国翻訳] [DL版]',
+    '[Group] [Artist] Title',
+    '(Event) Title (Series)',
+    '[Artist] 2nd Title (Series) [Korean] {Scanlator}',
+    '[アンソロジー] アンソロジー タイトル Vol.2 [DL版]',
+    '[作者] タイトル [进击的汉化组] (Full Color)',
+    '[サークル (作者)] タイトル総集編 [2020年1月1日]',
+]
+
+
+def reference_pop_tokens(name: str) -> Tuple[List[Token], str]:
+    ''' The original, quadratic implementation of Comic.pop_tokens, kept to
+        check the current one against. (It never returns for some names
+        starting with an unmatched opening bracket, such as '(title'.) '''
+    tokens: List[Token] = []
+
+    while True:
+        name = name.strip()
+        new_token = False
+        if Comic.has_token(name, front=True):
+            token, name = Comic.pop_token(name, front=True)
+            tokens.insert(0, token)
+            new_token = True
+        if Comic.has_token(name, front=False):
+            token, name = Comic.pop_token(name, front=False)
+            tokens.append(token)
+            new_token = True
+        if not new_token:
+            break
+
+    return tokens, name
+
+
+def check_pop_tokens(names: Iterable[str] = corpus):
+    ''' Raises AssertionError if Comic.pop_tokens disagrees with the
+        reference implementation on any of the names. '''
+    for name in names:
+        name = unicodedata.normalize('NFKC', name)
+        expected_tokens, expected_name = reference_pop_tokens(name)
+        tokens, remainder = Comic.pop_tokens(name)
+        assert remainder == expected_name, (name, remainder, expected_name)
+        assert [str(t) for t in tokens] == [str(t) for t in expected_tokens], (name, tokens)
+
+
+def check_similar():
+    ''' Raises AssertionError if SimilarityIndex pairs generic titles by
+        different authors, or misses a title differing only in width and its
+        (CN) suffix, by the same or an unknown author. '''
+    index: SimilarityIndex[str] = SimilarityIndex()
+    index.add('a/1', 'Vol. 1', '作者A')
+    index.add('b/1', 'Vol. 1', '作者B')
+    index.add('a/2', '総集編', 'Artist')
+    index.add('b/2', '総集編', 'Someone Else')
+    index.add('a/3', 'タイトル ２', 'Artist')
+    index.add('a/3 (cn)', 'タイトル 2 (CN)', 'ARTIST')
+    index.add('unknown/3', 'タイトル2')
+
+    pairs = {(a, b) for a, b, _ in index.pairs()}
+    expected = {('a/3', 'a/3 (cn)'), ('a/3', 'unknown/3'), ('a/3 (cn)', 'unknown/3')}
+    assert {tuple(sorted(pair)) for pair in pairs} == expected, pairs
+
+
+def benchmark_pop_tokens(names: Iterable[str] = corpus, long_name_tags=1000) -> Dict[str, str]:
+    ''' Times both implementations over the corpus, and over a single long
+        name with long_name_tags tags on each side. '''
+    names = [unicodedata.normalize('NFKC', name) for name in names]
+    long_name = '[tag] ' * long_name_tags + 'title' + ' (tag)' * long_name_tags
+    check_pop_tokens(names + [long_name])
+
+    def corpus_with(function):
+        return lambda: [function(name) for name in names]
+
+    results = {
+        'corpus, reference': time_function(corpus_with(reference_pop_tokens)),
+        'corpus, current': time_function(corpus_with(Comic.pop_tokens)),
+        'long name, reference': time_function(lambda: reference_pop_tokens(long_name), repeat=3),
+        'long name, current': time_function(lambda: Comic.pop_tokens(long_name), repeat=3),
+    }
+    return {key: f'{seconds * 1e6:.1f} us' for key, seconds in results.items()}
+
+
+class _DictToken:
+    ''' Token as it was, with a __dict__ and without interning. '''
+    def __init__(self, token: Token):
+        self.start_delimiter = token.start_delimiter
+        self.end_delimiter = token.end_delimiter
+        self.name = _copy(token.name)
+
+
+class _DictComic:
+    ''' Comic as it was, with a __dict__ and _DictTokens. '''
+    def __init__(self, comic: Comic):
+        self.raw_name = comic.raw_name
+        self.tokens = [_DictToken(token) for token in comic.tokens]
+        self.is_chinese = comic.is_chinese
+        self.author = comic.author and _copy(comic.author)
+        self.name = _copy(comic.name)
+
+
+def _copy(string: str) -> str:
+    # a distinct but equal string, as parsing without interning would produce
+    return string.encode('utf-8').decode('utf-8')
+
+
+def _allocated(build: Callable[[], Any]) -> Tuple[int, Any]:
+    ''' Returns the memory (in bytes) still allocated by build() once it
+        returns, and its result (which must be kept alive until measured). '''
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        return tracemalloc.get_traced_memory()[0] - before, result
+    finally:
+        tracemalloc.stop()
+
+
+def benchmark_memory(names: Iterable[str] = corpus, copies=1000) -> Dict[str, str]:
+    ''' Compares the memory used per parsed name by Comic and Token, by their
+        previous dict-backed and uninterned versions, and by the columns of
+        Comic.parse_many. The names are repeated copies times, much like
+        authors and groups repeat over a collection. Raw names are shared,
+        and not counted. '''
+    raw_names = list(names) * copies
+    comics = [Comic(name) for name in raw_names]
+
+    results: Dict[str, int] = {}
+    results['slotted'], _ = _allocated(lambda: [Comic(name) for name in raw_names])
+    results['dict-backed'], _ = _allocated(lambda: [_DictComic(comic) for comic in comics])
+    results['parse_many'], _ = _allocated(lambda: Comic.parse_many(raw_names))
+
+    return {key: f'{size / len(raw_names):.0f} bytes per name' for key, size in results.items()}
@@ -0,0 +1,127 @@
+''' A persistent cache of the author and title parsed from comics.
+
+    An entry is keyed by the comic's path, and is valid while the comic's
+    modification time (and that of its info file, with its size, if it has
+    one) are unchanged. Checking an entry takes a stat or two, instead of
+    listing the folder and parsing its info file and name.
+
+    Usage:
+        with InfoCache() as cache:  # in the user cache folder
+            organize(cache=cache)
+
+        organize(cache='comics.db')  # or any other file
+'''
+import os
+import os.path
+import sqlite3
+import threading
+from typing import Optional, Tuple, Union
+
+from tc.utils.fileutils import user_cache_dir
+
+Info = Tuple[Optional[str], Optional[str]]
+
+_info_files = {'json': 'info.json', 'txt': 'info.txt'}
+
+
+def default_cache_path() -> str:
+    return os.path.join(user_cache_dir('comics'), 'infocache.db')
+
+
+class InfoCache:
+    ''' Safe to share between threads. Changes are committed by commit(),
+        close(), or when leaving a with block. '''
+    path: str
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or default_cache_path()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                '''CREATE TABLE IF NOT EXISTS comic_info (
+                       path TEXT PRIMARY KEY, source TEXT, mtime INTEGER,
+                       info_mtime INTEGER, info_size INTEGER, author TEXT, title TEXT)'''
+            )
+
+    def lookup(self, path: str) -> Tuple[bool, Info]:
+        ''' Returns (True, (author, title)) if path has an up to date entry,
+            and (False, (None, None)) otherwise. '''
+        key = os.path.abspath(path)
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT source, mtime, info_mtime, info_size, author, title FROM comic_info WHERE path = ?',
+                [key]
+            ).fetchone()
+
+        if row is None:
+            return False, (None, None)
+
+        source, mtime, info_mtime, info_size, author, title = row
+        if _signature(key, source) != (mtime, info_mtime, info_size):
+            return False, (None, None)
+
+        return True, (author, title)
+
+    def store(self, path: str, source: str, info: Info):
+        ''' Saves the information read from path, which came from source
+            (see tc.comics.comic._classify). '''
+        key = os.path.abspath(path)
+        signature = _signature(key, source)
+        if signature is None:
+            return
+
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO comic_info VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [key, source, *signature, *info]
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM comic_info')
+
+    def commit(self):
+        with self._lock:
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.commit()
+            self._connection.close()
+
+    def __enter__(self) -> 'InfoCache':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _signature(path: str, source: str) -> Optional[Tuple[int, Optional[int], Optional[int]]]:
+    ''' Returns (mtime, info file mtime, info file size) for the comic at path,
+        or None if it (or its info file) no longer exists.
+
+        A folder's mtime changes when files are added to or removed from it, so
+        it also covers a folder changing source (such as gaining an info file).
+    '''
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        info_file = _info_files.get(source)
+        if info_file is None:
+            return mtime, None, None
+        info_stat = os.stat(os.path.join(path, info_file))
+        return mtime, info_stat.st_mtime_ns, info_stat.st_size
+    except OSError:
+        return None
+
+
+def open_cache(cache: Union[None, bool, str, InfoCache]) -> Tuple[Optional[InfoCache], bool]:
+    ''' Returns the InfoCache described by cache (see tc.comics.get_info), and
+        whether the caller opened it, and should close it. '''
+    if cache is None or cache is False:
+        return None, False
+    if isinstance(cache, InfoCache):
+        return cache, False
+    if cache is True:
+        return InfoCache(), True
+    return InfoCache(cache), True
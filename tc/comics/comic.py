@@ -2,8 +2,12 @@ import json
 import os
 import os.path
 import tc.utils
-from tc.utils.fileutils import surface, is_common_image as is_image
-from typing import Tuple, Optional, List
+from tc.utils.fileutils import surface, plan_moves, execute_moves, is_common_image as is_image
+from tc.utils.tracing import traced
+from .caching import InfoCache, open_cache
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, NamedTuple, Tuple, Optional, List, Union
 import sys
 import unicodedata
 
@@ -13,33 +17,42 @@ class Token:
     end_tokens = ')]}】'
     chinese_indicators = ('中国翻訳', '汉化', '大報社', '漢化', '翻译')
 
+    # tokens are created by the hundred thousand when indexing, and their
+    # names (translation groups, events, authors) repeat, so they are interned
+    __slots__ = ('start_delimiter', 'end_delimiter', 'name')
+
     start_delimiter: str
     end_delimiter: str
     name: str
-    _is_chinese: Optional[bool]
 
     def __init__(self, start_delimiter: str, name: str):
         self.start_delimiter = start_delimiter
         self.end_delimiter = self.end_tokens[self.start_tokens.find(start_delimiter)]
-        self.name = name
-        self._is_chinese = None
+        self.name = sys.intern(name)
 
     @property
     def is_chinese(self) -> bool:
-        if self._is_chinese is None:
-            self._is_chinese = False
-            for indicator in Token.chinese_indicators:
-                if indicator in self.name:
-                    self._is_chinese = True
-                    break
-
-        return self._is_chinese
+        return _has_chinese_indicator(self.name)
 
     def __str__(self) -> str:
         return self.start_delimiter + self.name + self.end_delimiter
 
 
+def _has_chinese_indicator(name: str) -> bool:
+    return any(indicator in name for indicator in Token.chinese_indicators)
+
+
+class ParsedComics(NamedTuple):
+    '''The result of `Comic.parse_many`: one column per attribute, with an
+    entry per name.'''
+    authors: List[Optional[str]]
+    names: List[str]
+    is_chinese: 'array[int]'  # 0 or 1
+
+
 class Comic:
+    __slots__ = ('raw_name', 'tokens', 'is_chinese', 'author', 'name')
+
     raw_name: str
     tokens: List[Token]
     is_chinese: bool
@@ -61,20 +74,38 @@ class Comic:
         a raw `]` character.
         '''
         self.raw_name = raw_name
-        self.tokens, self.name = Comic.pop_tokens(unicodedata.normalize('NFKC', raw_name))
-        self.is_chinese = False
-        self.author = None
-
-        for token in self.tokens:
-            if not self.is_chinese and token.is_chinese:
-                self.is_chinese = True
-            elif not self.author and token.start_delimiter == '[':
-                self.author = token.name
-            elif self.author and self.is_chinese:
+        self.tokens, self.author, self.name, self.is_chinese = Comic._parse(raw_name)
+
+    @staticmethod
+    def _parse(raw_name: str) -> Tuple[List[Token], Optional[str], str, bool]:
+        tokens, name = Comic.pop_tokens(unicodedata.normalize('NFKC', raw_name))
+        is_chinese = False
+        author = None
+
+        for token in tokens:
+            if not is_chinese and token.is_chinese:
+                is_chinese = True
+            elif not author and token.start_delimiter == '[':
+                author = token.name
+            elif author and is_chinese:
                 break
 
-        self.name = self.name and self.name.strip()
-        self.author = self.author and self.author.strip()
+        name = name and name.strip()
+        author = author and author.strip()
+        return tokens, author, name, is_chinese
+
+    @staticmethod
+    def parse_many(raw_names: Iterable[str]) -> ParsedComics:
+        '''Parses many names at once, returning their authors, names and whether
+        they are Chinese as columns, without keeping a `Comic` (or its tokens)
+        around for each name.'''
+        result = ParsedComics([], [], array('b'))
+        for raw_name in raw_names:
+            _, author, name, is_chinese = Comic._parse(raw_name)
+            result.authors.append(author)
+            result.names.append(name)
+            result.is_chinese.append(is_chinese)
+        return result
 
     def suggested_name(self) -> str:
         return self.name + (' (CN)' if self.is_chinese else '')
@@ -103,29 +134,86 @@ class Comic:
 
     @staticmethod
     def pop_tokens(name: str) -> Tuple[List[Token], str]:
-        tokens: List[Token] = []
+        '''Pops tags off both ends of a name, returning them and the remaining
+        (stripped) name.
+
+        Tags are popped alternately from the front and the back; the result
+        lists the tags popped from the front, last popped first, followed by
+        the tags popped from the back, in the order they were popped.
+
+        This is a single scan over the name, moving a start and an end index
+        inwards.
+        '''
+        front: List[Token] = []
+        back: List[Token] = []
+        start, end = 0, len(name)
+        # a side without a tag never gains one, since its index can't move
+        front_done = back_done = False
+        # an opening bracket at the front without a closing bracket
+        unmatched_front = False
 
         while True:
-            name = name.strip()
-            new_token = False
-            if Comic.has_token(name, front=True):
-                token, name = Comic.pop_token(name, front=True)
-                tokens.insert(0, token)
-                new_token = True
-            if Comic.has_token(name, front=False):
-                token, name = Comic.pop_token(name, front=False)
-                tokens.append(token)
-                new_token = True
-            if not new_token:
+            while start < end and name[start].isspace():
+                start += 1
+            while end > start and name[end - 1].isspace():
+                end -= 1
+
+            front_token = None
+            back_token = None
+
+            if not front_done and start < end:
+                i = Token.start_tokens.find(name[start])
+                close = -1
+                if i != -1 and not unmatched_front:
+                    close = name.find(Token.end_tokens[i], start + 1, end)
+
+                if i == -1:
+                    front_done = True
+                elif close != -1:
+                    front_token = Token(name[start], name[start+1:close])
+                    start = close + 1
+                else:
+                    # an unmatched bracket tags everything but the last character,
+                    # but leaves the name as is
+                    unmatched_front = True
+                    front_token = Token(name[start], name[start+1:end-1])
+
+            if not back_done and start < end:
+                i = Token.end_tokens.find(name[end - 1])
+                if i != -1:
+                    start_token = Token.start_tokens[i]
+                    open_ = name.rfind(start_token, start, end - 1)
+                    if open_ == -1:
+                        # without an opening bracket, everything else is the tag
+                        open_ = start
+                    back_token = Token(start_token, name[open_+1:end-1])
+                    end = open_
+                else:
+                    back_done = True
+
+            if unmatched_front and back_token is None:
+                # nothing changes from here on (popping would never end), so we
+                # keep the unmatched bracket in the name
+                break
+
+            if front_token is not None:
+                front.append(front_token)
+            if back_token is not None:
+                back.append(back_token)
+            if front_token is None and back_token is None:
                 break
 
-        return tokens, name
+        front.reverse()
+        return front + back, name[start:end]
 
     def __str__(self):
         return self.name + ': ' + ''.join(map(str, self.tokens))
 
 
-def get_info(path: str) -> Tuple[Optional[str], Optional[str]]:
+CacheOption = Union[None, bool, str, InfoCache]
+
+
+def get_info(path: str, cache: CacheOption = None) -> Tuple[Optional[str], Optional[str]]:
     '''Attempts to get author and title information from a comic.
 
     Currently supports the following:
@@ -133,45 +221,140 @@ def get_info(path: str) -> Tuple[Optional[str], Optional[str]]:
      - the folder's basename in standard format (refer to the `Comic` class)
 
     Also adds language information, but only for Chinese
+
+    With `cache` (True for the default cache file, the path of a cache file, or
+    an open `InfoCache`), information is reused from, and saved to, a persistent
+    cache, so unchanged comics are not read again (refer to `tc.comics.caching`).
     '''
-    if os.path.isdir(path):
-        if 'info.json' in os.listdir(path):
-            info_path = os.path.join(path, 'info.json')
-            info = json.load(open(info_path, encoding='utf-8'))
-            gallery_info = info['gallery_info']
-            title = gallery_info['title_original']
-            language = gallery_info['language']
-            comic = Comic(title)
-            formatted_name = comic.name + (' (CN)' if language.lower() == 'chinese' else '')
-            return comic.author, formatted_name
-        elif 'info.txt' in os.listdir(path):
-            info_path = os.path.join(path, 'info.txt')
-            title = ''
-            with open(info_path, encoding='utf-8') as info_file:
-                for line in info_file:
-                    if line.startswith('http'):
-                        break
-                    title = line.strip()
+    info_cache, opened = open_cache(cache)
+    try:
+        return _get_info(path, info_cache)
+    finally:
+        if opened:
+            info_cache.close()
+
+
+def get_info_many(paths: Iterable[str], workers=8,
+                  cache: CacheOption = None) -> List[Tuple[Optional[str], Optional[str]]]:
+    '''Returns `get_info(path, cache)` for each path, in the same order.
+
+    Comics are read in parallel by a pool of `workers` threads, which mostly
+    helps on slow (such as network) drives.
+    '''
+    info_cache, opened = open_cache(cache)
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda path: _get_info(path, info_cache), paths))
+    finally:
+        if opened:
+            info_cache.close()
+        elif info_cache is not None:
+            info_cache.commit()
+
+
+def _get_info(path: str, cache: Optional[InfoCache]) -> Tuple[Optional[str], Optional[str]]:
+    if cache is not None:
+        found, info = cache.lookup(path)
+        if found:
+            return info
+
+    source = _classify(path)
+    info = _read_info(path, source)
+
+    if cache is not None:
+        cache.store(path, source, info)
+    return info
+
+
+def _classify(path: str) -> str:
+    '''Returns where a comic's information comes from: 'json' or 'txt' (an info
+    file), 'images' (the folder name of a folder of images), 'file' (the file
+    name), or 'none' (a folder that isn't a comic).
+
+    A folder is only listed once, and the listing stops early at an `info.json`.
+    '''
+    if not os.path.isdir(path):
+        return 'file'
+
+    has_txt = has_images = False
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name == 'info.json':
+                return 'json'
+            if entry.name == 'info.txt':
+                has_txt = True
+            elif not has_images and is_image(entry.name):
+                has_images = True
+
+    if has_txt:
+        return 'txt'
+    if has_images:
+        return 'images'
+    return 'none'
+
+
+def _read_info(path: str, source: str) -> Tuple[Optional[str], Optional[str]]:
+    if source == 'json':
+        info_path = os.path.join(path, 'info.json')
+        with open(info_path, encoding='utf-8') as info_file:
+            info = json.load(info_file)
+        gallery_info = info['gallery_info']
+        title = gallery_info['title_original']
+        language = gallery_info['language']
+        comic = Comic(title)
+        formatted_name = comic.name + (' (CN)' if language.lower() == 'chinese' else '')
+        return comic.author, formatted_name
+    elif source == 'txt':
+        info_path = os.path.join(path, 'info.txt')
+        title = ''
+        with open(info_path, encoding='utf-8') as info_file:
+            for line in info_file:
+                if line.startswith('http'):
                     break
-            comic = Comic(title)
-            formatted_name = comic.suggested_name()
-            return comic.author, formatted_name
-        elif any(is_image(f) for f in os.listdir(path)):
-            title = os.path.basename(path)
-            comic = Comic(title)
-            formatted_name = comic.suggested_name()
-            return comic.author, formatted_name
-        else:
-            return None, None
-    else:
+                title = line.strip()
+                break
+        comic = Comic(title)
+        formatted_name = comic.suggested_name()
+        return comic.author, formatted_name
+    elif source == 'images':
+        title = os.path.basename(path)
+        comic = Comic(title)
+        formatted_name = comic.suggested_name()
+        return comic.author, formatted_name
+    elif source == 'file':
         basename = os.path.basename(path)
         title, _ = os.path.splitext(basename)
         comic = Comic(title)
         formatted_name = comic.suggested_name()
         return comic.author, formatted_name
+    else:
+        return None, None
+
+
+def plan_organize(path: str = os.path.curdir,
+                  cache: CacheOption = None) -> List[Tuple[str, Optional[str]]]:
+    '''Plans `organize(path)` without changing anything.
+
+    Returns a list of (item, target) for every item in the folder, where the
+    target is None for items that would be skipped. Targets are resolved as
+    they would be moved, including name collisions.
+    '''
+    full_paths = [os.path.join(path, item) for item in os.listdir(path)]
+
+    moves = []
+    for full_path, (author, name) in zip(full_paths, get_info_many(full_paths, cache=cache)):
+        if author and name:
+            author = tc.utils.sanitize_filename(author)
+            name = tc.utils.sanitize_filename(name)
+            moves.append((full_path, os.path.join(path, author, name)))
+
+    targets = dict(plan_moves(moves))
+    return [(full_path, targets.get(full_path)) for full_path in full_paths]
 
 
-def organize(path: str = os.path.curdir, force_all=False):
+@traced(name='comics.organize')
+def organize(path: str = os.path.curdir, force_all=False, cache: CacheOption = None,
+             dry_run=False, workers=8) -> List[Tuple[str, Optional[str]]]:
     '''Organizes all items identified as a comic in the current directory.
 
     To be successfully identified as a comic, it must contain an `info.json` or
@@ -179,29 +362,32 @@ def organize(path: str = os.path.curdir, force_all=False):
     standard format (refer to the `Comic` class)
 
     Unlike `tc.dlsite.organize`, organized items stay in the current directory.
+
+    With `cache`, comic information is cached as in `get_info`, so that
+    rerunning over the same folder doesn't read unchanged comics again.
+
+    Every move is planned (see `plan_organize`) and reported before anything
+    is moved; with `dry_run`, nothing is (including the surfacing done by
+    `force_all`). The moves are then made by a pool of `workers` threads.
+
+    Returns the plan.
     '''
-    for item in os.listdir(path):
-        if force_all:
-            surface(item)
-        full_path = os.path.join(path, item)
-        author, name = get_info(full_path)
-        if author and name:
-            author = tc.utils.sanitize_filename(author)
-            name = tc.utils.sanitize_filename(name)
-            parent_path = os.path.join(path, author)
+    if force_all and not dry_run:
+        for item in os.listdir(path):
+            surface(os.path.join(path, item))
 
-            if not os.path.isdir(parent_path):
-                os.mkdir(parent_path)
+    plan = plan_organize(path, cache=cache)
 
-            renamed = tc.utils.move(full_path, folder=parent_path, filename=name)
-            success = os.path.exists(renamed)  # in theory this should always be true
+    for full_path, target in plan:
+        print(f'{full_path}\n\t> {target}' if target else f'{full_path}\n\tskipped', file=sys.stderr)
 
-            if success:
-                final_path = os.path.join(parent_path, name)
-                print(f'{full_path}\n\t> {final_path}', file=sys.stderr)
-                surface(final_path)
-                continue
+    if not dry_run:
+        execute_moves([move for move in plan if move[1] is not None],
+                      workers=workers, on_moved=_surface_folder)
 
-            print(f'{full_path}\n\tunsuccessful', file=sys.stderr)
-        else:
-            print(f'{full_path}\n\tskipped', file=sys.stderr)
+    return plan
+
+
+def _surface_folder(path: str):
+    if os.path.isdir(path):
+        surface(path)
@@ -0,0 +1,161 @@
+''' Finds comics stored more than once under slightly different names, such
+    as with full-width instead of half-width text, different translation
+    tags, or with and without a (CN) suffix.
+
+    Names are normalized (NFKC, case folded, without tags, suffixes,
+    punctuation or spaces) and split into character trigrams. Instead of
+    comparing every pair of names, each name gets a MinHash signature, and
+    only names whose signatures agree on a whole band (locality-sensitive
+    hashing) are compared, so finding duplicates takes roughly linear time.
+    Comics whose authors are both known are only paired if their authors
+    are similar too, so that generic titles (such as "Vol. 1") by different
+    authors aren't taken for the same work.
+
+    Usage:
+        for a, b, similarity in find_similar('D:/comics'):
+            print(f'{similarity:.2f} {a} {b}')
+'''
+import os
+import random
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import Dict, FrozenSet, Generic, Hashable, List, Optional, Set, Tuple, TypeVar
+
+from .comic import CacheOption, get_info_many
+
+K = TypeVar('K', bound=Hashable)
+
+# a mersenne prime above every crc32
+_prime = (1 << 61) - 1
+_suffixes = ('(cn)',)
+
+
+def normalize(text: str) -> str:
+    ''' Returns text in NFKC form, case folded, without a (CN) suffix, and
+        without anything that isn't a letter or a digit. '''
+    text = unicodedata.normalize('NFKC', text).casefold().strip()
+    for suffix in _suffixes:
+        if text.endswith(suffix):
+            text = text[:-len(suffix)]
+    return ''.join(c for c in text if c.isalnum())
+
+
+def shingles(text: str, n=3) -> FrozenSet[str]:
+    ''' Returns the set of n-grams of text (or text itself, if shorter). '''
+    if len(text) <= n:
+        return frozenset([text])
+    return frozenset(text[i:i+n] for i in range(len(text) - n + 1))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class SimilarityIndex(Generic[K]):
+    ''' An index of comic names and authors, for finding near duplicates.
+
+        With the default 16 bands of 4 rows, pairs at least 50% similar are
+        likely to be compared, and pairs 80% similar almost always are. '''
+
+    def __init__(self, bands=16, rows=4, seed=0):
+        self.bands = bands
+        self.rows = rows
+        generator = random.Random(seed)
+        self._coefficients = [
+            (generator.randrange(1, _prime), generator.randrange(0, _prime))
+            for _ in range(bands * rows)
+        ]
+        # trigrams repeat a lot between names, so each one is only hashed once
+        self._hashes: Dict[str, Tuple[int, ...]] = {}
+        self._shingles: Dict[K, FrozenSet[str]] = {}
+        self._authors: Dict[K, FrozenSet[str]] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], List[K]] = defaultdict(list)
+
+    def add(self, key: K, name: str, author: Optional[str] = None):
+        ''' Adds a comic, unless its name normalizes to nothing (such as a name
+            made only of punctuation), which can't be compared. The author is
+            unknown if None, or if it normalizes to nothing. '''
+        if key in self._shingles:
+            raise ValueError(f'{key!r} is already in the index')
+
+        normalized = normalize(name)
+        if not normalized:
+            return
+
+        grams = shingles(normalized)
+        self._shingles[key] = grams
+        if author and normalize(author):
+            self._authors[key] = shingles(normalize(author))
+
+        signature = self._signature(grams)
+        for band in range(self.bands):
+            rows = tuple(signature[band * self.rows:(band + 1) * self.rows])
+            self._buckets[band, rows].append(key)
+
+    def _signature(self, grams: FrozenSet[str]) -> List[int]:
+        return list(map(min, zip(*map(self._hash, grams))))
+
+    def _hash(self, gram: str) -> Tuple[int, ...]:
+        hashes = self._hashes.get(gram)
+        if hashes is None:
+            h = zlib.crc32(gram.encode('utf-8'))
+            hashes = self._hashes[gram] = tuple((a * h + b) % _prime for a, b in self._coefficients)
+        return hashes
+
+    def pairs(self, threshold=0.8, author_threshold=0.5) -> List[Tuple[K, K, float]]:
+        ''' Returns (key, key, similarity) for every pair of comics found to be
+            at least threshold similar (the Jaccard similarity of their
+            trigrams), most similar first. Pairs whose authors are both known
+            must also have authors at least author_threshold similar. '''
+        compared: Set[Tuple[K, K]] = set()
+        result = []
+        for keys in self._buckets.values():
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    if (a, b) in compared:
+                        continue
+                    compared.add((a, b))
+                    similarity = jaccard(self._shingles[a], self._shingles[b])
+                    if similarity >= threshold and self._same_author(a, b, author_threshold):
+                        result.append((a, b, similarity))
+
+        result.sort(key=lambda pair: pair[2], reverse=True)
+        return result
+
+    def _same_author(self, a: K, b: K, threshold: float) -> bool:
+        if a not in self._authors or b not in self._authors:
+            return True
+        return jaccard(self._authors[a], self._authors[b]) >= threshold
+
+    def __len__(self) -> int:
+        return len(self._shingles)
+
+
+def find_similar(root: str = os.path.curdir, threshold=0.8, organized=False,
+                 cache: CacheOption = None) -> List[Tuple[str, str, float]]:
+    ''' Returns (path, path, similarity) for the pairs of comics in root that
+        are probably the same work, most similar first.
+
+        Comics are read as in `tc.comics.get_info` (with the same `cache`
+        option), and items that aren't comics are ignored. With `organized`,
+        root is instead a collection sorted by `tc.comics.organize`, with a
+        folder per author containing that author's comics.
+    '''
+    index: SimilarityIndex[str] = SimilarityIndex()
+
+    if organized:
+        for author in os.listdir(root):
+            author_path = os.path.join(root, author)
+            if os.path.isdir(author_path):
+                for name in os.listdir(author_path):
+                    index.add(os.path.join(author_path, name), name, author)
+    else:
+        full_paths = [os.path.join(root, item) for item in os.listdir(root)]
+        for full_path, (author, name) in zip(full_paths, get_info_many(full_paths, cache=cache)):
+            if name:
+                index.add(full_path, name, author)
+
+    return index.pairs(threshold)
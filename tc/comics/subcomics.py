@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from array import array
 from typing import Iterable, List, Optional, Tuple, Union
 
 import tc.utils
+from tc.utils.fileutils import plan_moves, execute_moves
+from tc.utils.tracing import traced
 from .comic import Comic
 
 
@@ -14,11 +16,29 @@ SubcomicSpec = Union[List[Union[PageSpec, str]],
                      str]
 
 
-@dataclass
 class SubcomicInfo:
+    # a slotted class rather than a dataclass, since dataclass(slots=True)
+    # needs python 3.10
+    __slots__ = ('name', 'start', 'end')
+
     name: str
     start: int
-    end: Optional[int] = None
+    end: Optional[int]
+
+    def __init__(self, name: str, start: int, end: Optional[int] = None):
+        self.name = name
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}(name={self.name!r}, start={self.start!r}, end={self.end!r})'
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.name, self.start, self.end) == (other.name, other.start, other.end)
+
+    __hash__ = None  # type: ignore  # mutable
 
     @classmethod
     def parse(cls, page_spec: PageSpec, name: str) -> SubcomicInfo:
@@ -54,23 +74,28 @@ class SubcomicSpecification:
 
         self.spec = [s for s in spec if s.name != '']
 
-        # verification
-        v_set = set()
-        v_max = None
-        for s in self.spec:
-            if v_max is not None and s.start > v_max:
+        # verification: each range must start after the previous one ends
+        last_end: Optional[int] = None
+        for i, s in enumerate(self.spec):
+            if s.end is not None and s.end < s.start:
+                raise ValueError(f'pages {s.start}-{s.end} out of order in specification')
+            if i > 0 and (last_end is None or s.start <= last_end):
                 raise ValueError(f'page {s.start} repeated in specification')
+            last_end = s.end
 
-            if s.end is None:
-                if v_max is not None:
-                    raise ValueError(f'page <infinity> repeated in specification')
-                v_max = s.start - 1
-
-            for page in s.range(upper_limit=0):
-                if page in v_set:
-                    raise ValueError(f'page {page} repeated in specification')
-                v_set.add(page)
+    def assignments(self, page_count: int) -> 'array[int]':
+        '''Returns, for each of the pages 1 to `page_count`, the index of the
+        subcomic that contains it, or -1 if none does.
 
+        Pages are 1-indexed, so page `p` is at index `p - 1`.
+        '''
+        result = array('i', [-1]) * max(page_count, 0)
+        for i, s in enumerate(self.spec):
+            start = max(s.start, 1)
+            end = page_count if s.end is None else min(s.end, page_count)
+            if start <= end:
+                result[start - 1:end] = array('i', [i]) * (end - start + 1)
+        return result
 
     def __iter__(self):
         return iter(self.spec)
@@ -136,6 +161,7 @@ class SubcomicSpecification:
         return cls(SubcomicInfo.parse(page_spec, name) for page_spec, name in spec_)
 
 
+@traced
 def organize_subcomics(
     folder: str,
     spec: Union[SubcomicSpec, SubcomicSpecification],
@@ -154,6 +180,7 @@ def organize_subcomics(
         spec = SubcomicSpecification.parse(spec)
 
     file_list = tc.utils.listdir(folder)
+    new_folder_names = []
 
     for info in spec:
         new_folder_name = tc.utils.sanitize_filename(f'{info.start + naming_offset} - {info.name}')
@@ -162,15 +189,12 @@ def organize_subcomics(
             print(f'will create folder {new_folder_name}')
         else:
             os.mkdir(new_folder)
+        new_folder_names.append(new_folder_name)
 
-        for i in info.range(upper_limit=len(file_list) - offset):
-            i -= 1  # account for 1-indexedness
-            if dry_run:
-                print(f'will move file {file_list[i+offset]} into folder {new_folder_name}')
-            else:
-                origin_file = os.path.join(folder, file_list[i+offset])
-                tc.utils.move(origin_file, folder=new_folder)
+    _move_pages(folder, file_list, spec, offset, new_folder_names, dry_run)
 
+
+@traced
 def organize_subcomics_with_artists(
     folder: str,
     spec: Union[SubcomicSpec, SubcomicSpecification],
@@ -188,6 +212,7 @@ def organize_subcomics_with_artists(
         spec = SubcomicSpecification.parse(spec)
 
     file_list = tc.utils.listdir(folder)
+    new_folder_names = []
 
     for info in spec:
         comic = Comic(info.name)
@@ -212,11 +237,31 @@ def organize_subcomics_with_artists(
             print(f'will create folder {new_folder_name}')
         else:
             os.mkdir(new_folder)
+        new_folder_names.append(new_folder_name)
 
-        for i in info.range(upper_limit=len(file_list) - offset):
-            i -= 1  # account for 1-indexedness
-            if dry_run:
-                print(f'will move file {file_list[i+offset]} into folder {new_folder_name}')
-            else:
-                origin_file = os.path.join(folder, file_list[i+offset])
-                tc.utils.move(origin_file, folder=new_folder)
+    _move_pages(folder, file_list, spec, offset, new_folder_names, dry_run)
+
+
+def _move_pages(
+    folder: str,
+    file_list: List[str],
+    spec: SubcomicSpecification,
+    offset: int,
+    new_folder_names: List[str],
+    dry_run: bool
+):
+    '''Moves the pages of each subcomic in `spec` to the corresponding folder in
+    `new_folder_names`, in one batch.'''
+    moves = []
+    for i, subcomic in enumerate(spec.assignments(len(file_list) - offset)):
+        if subcomic == -1:
+            continue
+        file_name = file_list[i + offset]
+        if dry_run:
+            print(f'will move file {file_name} into folder {new_folder_names[subcomic]}')
+        else:
+            moves.append((os.path.join(folder, file_name),
+                          os.path.join(folder, new_folder_names[subcomic], file_name)))
+
+    if moves:
+        execute_moves(plan_moves(moves), makedirs=False)
@@ -1,4 +1,13 @@
 """ The subfiles module provides the ability to iterate through all
     files or folders in a directory and its subdirectories. """
 
-from .comics import ReadOnlyManager, ReadOnlyProfile, Comic
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.comics': ['ReadOnlyManager', 'ReadOnlyProfile', 'Comic'],
+})
+
+if TYPE_CHECKING:
+    from .comics import ReadOnlyManager, ReadOnlyProfile, Comic
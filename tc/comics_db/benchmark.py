@@ -0,0 +1,184 @@
+''' Benchmarks for search string parsing, which checks that the current parser
+    agrees with the original one, over a corpus of typical searches and over
+    random ones (with and without error correction).
+
+    Usage:
+        >>> from tc.utils import print_dict
+        >>> fuzz_split_tokens()
+        >>> print_dict(benchmark_split_tokens())
+'''
+import random
+from typing import Dict, Iterable
+
+from tc.utils.benchmark import time_function
+from .text_search import (
+    CompiledSearch, ParserMode, SplitTokensResult, _compile_search, compile_search, split_tokens
+)
+
+
+corpus = [
+    '',
+    'title',
+    'a longer search with several words',
+    'author:someone tag:"full color" category:manga',
+    '"quoted title" loved:true',
+    'playlist:later tag:x tag:y tag:z title:"東方 Project"',
+    'tag:"unterminated quote',
+    'author:a:b',
+    '"mixed"strings',
+    'mi"xed',
+    'a: b',
+    '"a":"b" :c ::',
+    '   spaces   everywhere   ',
+    'loved:false 作者:名前 物語',
+]
+
+# random searches are mostly made of the characters the parser treats specially
+_alphabet = 'aab  ::""é東'
+
+
+def reference_compile_search(search_term: str) -> CompiledSearch:
+    ''' The original implementation of compile_search, without caching. '''
+    tokens, _ = reference_split_tokens(search_term, correct_errors=True)
+
+    names = []
+    authors = []
+    categories = []
+    tags = []
+    playlists = []
+    loved = None
+
+    for key, value in tokens:
+        if key == 'title':
+            # we don't have the ability to search separately for titles yet
+            names.append(value)
+        elif key == 'author':
+            authors.append(value)
+        elif key == 'category':
+            categories.append(value)
+        elif key == 'tag':
+            tags.append(value)
+        elif key == 'playlist':
+            playlists.append(value)
+        elif key == 'loved':
+            if value.lower().startswith('t'):
+                loved = True
+        else:
+            # we won't throw an error, we'll just let it search
+            names.append(value)
+
+    return names, authors, categories, tags, playlists, loved
+
+
+def reference_split_tokens(search_term: str, correct_errors=False) -> SplitTokensResult:
+    ''' The original, character at a time, implementation of split_tokens,
+        kept to check the current one against. '''
+
+    result = []
+
+    last_token = ''
+    parser_cache = ''
+    parser_mode = ParserMode.Initial
+    parser_index = 0
+
+    def push_token():
+        nonlocal last_token, parser_cache, parser_mode
+
+        result.append((last_token, parser_cache))
+        last_token = ''
+        parser_cache = ''
+        parser_mode = ParserMode.Initial
+
+    def error(message: str) -> SplitTokensResult:
+        if correct_errors:
+            remaining_search_term = parser_cache + search_term[parser_index:].replace('"', '')
+            result.append((last_token, remaining_search_term))
+
+        return result, message
+
+    while parser_index < len(search_term):
+        next_char = search_term[parser_index]
+
+        if parser_mode == ParserMode.String:
+            if next_char == '"':
+                parser_mode = ParserMode.StringEnd
+            else:
+                parser_cache += next_char
+
+        elif parser_mode == ParserMode.StringEnd and next_char not in ': ':
+            return error('Cannot mix quoted and non-quoted strings')
+
+        elif next_char == '"':
+            if parser_cache != '':
+                return error('Cannot mix quoted and non-quoted strings')
+
+            parser_mode = ParserMode.String
+
+        elif next_char == ':':
+            if parser_mode == ParserMode.Argument:
+                return error("Argument indicator ':' cannot appear twice in an argument")
+
+            last_token = parser_cache
+            parser_cache = ''
+            parser_mode = ParserMode.Argument
+
+        elif next_char == ' ':
+            if parser_cache != '':
+                push_token()
+        else:
+            parser_cache += next_char
+
+        parser_index += 1
+
+    if parser_cache != '':
+        push_token()
+
+    return result, None
+
+
+def random_search(generator: random.Random, max_length=24) -> str:
+    ''' Returns a random search string, of up to max_length characters. '''
+    return ''.join(generator.choice(_alphabet) for _ in range(generator.randrange(max_length + 1)))
+
+
+def check_split_tokens(search_terms: Iterable[str] = corpus):
+    ''' Raises AssertionError if split_tokens or compile_search disagree with
+        the reference implementations on any of the search terms. '''
+    for search_term in search_terms:
+        for correct_errors in (False, True):
+            expected = reference_split_tokens(search_term, correct_errors)
+            actual = split_tokens(search_term, correct_errors)
+            assert actual == expected, (search_term, correct_errors, actual, expected)
+        expected_search = reference_compile_search(search_term)
+        assert compile_search(search_term) == expected_search, search_term
+        assert compile_search(search_term) == expected_search, search_term  # cached
+
+
+def fuzz_split_tokens(count=100000, seed=0):
+    ''' Checks split_tokens and compile_search (see check_split_tokens) on the
+        corpus and on count random search strings. '''
+    generator = random.Random(seed)
+    check_split_tokens(corpus)
+    check_split_tokens(random_search(generator) for _ in range(count))
+
+
+def benchmark_split_tokens(search_terms: Iterable[str] = corpus, long_term_words=1000) -> Dict[str, str]:
+    ''' Times both implementations over the corpus, and over a single long
+        search of long_term_words words, and compile_search when cached. '''
+    search_terms = list(search_terms)
+    long_term = ' '.join(['tag:"some tag"', 'author:someone', 'word'] * (long_term_words // 3))
+    check_split_tokens(search_terms + [long_term])
+
+    def corpus_with(function):
+        return lambda: [function(search_term) for search_term in search_terms]
+
+    _compile_search.cache_clear()
+    compile_search(long_term)
+    results = {
+        'corpus, reference': time_function(corpus_with(reference_split_tokens)),
+        'corpus, current': time_function(corpus_with(split_tokens)),
+        'long search, reference': time_function(lambda: reference_split_tokens(long_term), repeat=3),
+        'long search, current': time_function(lambda: split_tokens(long_term), repeat=3),
+        'long search, compile_search cached': time_function(lambda: compile_search(long_term), repeat=3),
+    }
+    return {key: f'{seconds * 1e6:.1f} us' for key, seconds in results.items()}
@@ -1,20 +1,33 @@
 from __future__ import annotations
 
 import datetime
+import itertools
 import json
 import os
 import random
 import re
+import sqlite3
 import subprocess
+import threading
+import warnings
+import zlib
 from collections import Counter
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 from xml.etree import ElementTree
 
 from natsort import natsorted
 
 import tc.sqlite.manager as tcsql
 import tc.subfiles
+from tc.comics_db.filecache import FileListCache, first_file
+from tc.comics_db.fulltext import (
+    FullTextIndex, library_fingerprint, match_expression, min_query_length, search_clause, short_search_clause
+)
+from tc.comics_db.result_cache import ResultCache
 from tc.comics_db.text_search import compile_search
+from tc.sqlite.metrics import QueryMetrics
+from tc.utils.tracing import traced
 
 
 class Comic:
@@ -46,6 +59,56 @@ class Comic:
 
         return self.author.lower(), self.display_title.lower()
 
+    def sort_cursor(self, primary_key: Optional[str], seed: Optional[int] = None) -> Tuple[Any, ...]:
+        ''' Returns this comic's position in search results sorted by primary_key
+            (with the same seed, if random), to pass as `after` for the page
+            following it. See `ReadOnlyManager.search_comics`. '''
+        folded = tcsql.casefold
+        if primary_key is None:
+            return self.unique_identifier,
+        if primary_key == 'title':
+            return folded(self.display_title), folded(self.author), self.unique_identifier
+        if primary_key == 'category':
+            return (folded(self.category), folded(self.author), folded(self.display_title),
+                    self.unique_identifier)
+        if primary_key == 'random':
+            return seeded_random(seed, self.unique_identifier), self.unique_identifier
+        if primary_key == 'date added':
+            date = datetime.datetime.strptime(self.date_added, '%Y-%m-%d')
+            return (-(date.toordinal() + _julian_day_offset), folded(self.author),
+                    folded(self.display_title), self.unique_identifier)
+
+        return folded(self.author), folded(self.display_title), self.unique_identifier
+
+
+def seeded_random(seed: Optional[int], key: str) -> int:
+    ''' A pseudo-random number for key, which is always the same for the same seed. '''
+    return zlib.crc32(f'{seed}\0{key}'.encode('utf-8'))
+
+# julianday(date) = date.toordinal() + _julian_day_offset
+_julian_day_offset = 1721424.5
+
+_display_title = "coalesce(nullif(comics.display_title COLLATE BINARY, ''), comics.title)"
+
+# the SQL equivalent of Comic.sort_cursor, which must match it exactly
+_sort_expressions = {
+    None: ['comics.unique_identifier'],
+    'title': [f'casefold({_display_title})', 'casefold(comics.author)', 'comics.unique_identifier'],
+    'category': ['casefold(comics.category)', 'casefold(comics.author)', f'casefold({_display_title})',
+                 'comics.unique_identifier'],
+    'random': ['seeded_random(?, comics.unique_identifier)', 'comics.unique_identifier'],
+    'date added': ['-julianday(substr(comics.date_added, 1, 10))', 'casefold(comics.author)',
+                   f'casefold({_display_title})', 'comics.unique_identifier'],
+    'author': ['casefold(comics.author)', f'casefold({_display_title})', 'comics.unique_identifier'],
+}
+
+# queries take at most this many parameters (SQLITE_MAX_VARIABLE_NUMBER was 999
+# before SQLite 3.32), so longer lists of ids are read in chunks
+_max_variables = 900
+
+_comic_columns = '''comics.path, comics.unique_identifier, comics.title, comics.author,
+                    comics.category, comics.display_title, comics.loved, comics.date_added'''
+
 class _Profile:
     name: str
     image_dimensions: Tuple[int, int]
@@ -120,6 +183,121 @@ class ReadOnlyProfile(_Profile):
         self.execution_arguments = []
 
 
+def _result_size(result: Tuple[Tuple[Comic, ...], Dict[str, int], Dict[str, int], Dict[str, int]]) -> int:
+    ''' Roughly estimates the memory used by a search result, in bytes. '''
+    comics, *facets = result
+    size = 0
+    for comic in comics:
+        size += 600 + len(comic.path) + len(comic.title) + len(comic.author) + len(comic.display_title)
+        size += 80 * (len(comic.tags) + len(comic.playlists))
+    for facet in facets:
+        size += sum(150 + len(name) for name in facet)
+    return size
+
+def _normalized(names: Iterable[str]) -> Tuple[str, ...]:
+    # these are matched with IN, so neither order nor repeats matter
+    return tuple(sorted(set(names)))
+
+class _Connections(NamedTuple):
+    pool: tcsql.ConnectionPool
+    fulltext: bool  # whether the pool's connections have the full-text index attached
+    snapshot: Optional[tcsql.Snapshot] = None  # what the pool's connections read, if not the file
+    version: Any = None  # tcsql.database_version of the file when the snapshot was taken
+    fulltext_version: Any = None  # and when the full-text index was last updated
+    fulltext_fingerprint: Any = None  # the library_fingerprint the index was updated from
+
+# connections replaced while queries may still be about to use them are closed
+# this many seconds later (queries that already have one keep it until done)
+_retire_after = 5.0
+
+class _Condition(NamedTuple):
+    sql: str  # on the comics table
+    arguments: List[Any]
+
+def _facet_queries(condition: _Condition, top: Optional[int]) -> List[Tuple[str, List[Any]]]:
+    ''' Returns the queries counting the categories, authors and tags of the
+        comics matching condition, each returning (name, count) for the `top`
+        most common (or all) names. '''
+    # names are grouped and ordered case folded, as the viewer's UTF8_GENERAL_CI
+    # collation would, but with a casefold() per row rather than a comparison
+    # callback per pair (see tc.sqlite.register_unicode_functions)
+    limit = [-1 if top is None else top]
+
+    def grouped(name: str) -> str:
+        return f' GROUP BY casefold({name}) ORDER BY 2 DESC, casefold({name}) LIMIT ?'
+
+    return [
+        (f'SELECT category, COUNT(*) FROM comics WHERE {condition.sql}' + grouped('category'),
+         condition.arguments + limit),
+        (f'SELECT author, COUNT(*) FROM comics WHERE {condition.sql}' + grouped('author'),
+         condition.arguments + limit),
+        ('SELECT tag, COUNT(DISTINCT comic) FROM comic_tags WHERE comic IN '
+         f'(SELECT unique_identifier FROM comics WHERE {condition.sql})' + grouped('tag'),
+         condition.arguments + limit),
+    ]
+
+def _read_comics(
+    manager: tcsql.SQLiteManager,
+    condition: _Condition,
+    sort: Optional[str],
+    seed: Optional[int],
+    limit: Optional[int],
+    offset: int,
+    after: Optional[Tuple[Any, ...]]
+) -> Iterator[Comic]:
+    ''' Yields the comics matching condition, sorted and paged in SQL (see
+        `ReadOnlyManager.search_comics`), as they are read. '''
+    if sort not in _sort_expressions:
+        raise ValueError(f'cannot sort by {sort!r}')
+    if sort == 'random' and seed is None:
+        if offset or after is not None:
+            # each call would be in a different order, so pages wouldn't line up
+            raise ValueError('paging a random order needs a seed')
+        seed = random.randrange(2 ** 31)
+
+    keys = _sort_expressions[sort]
+    key_arguments = [seed] if sort == 'random' else []
+    where, arguments = condition.sql, list(condition.arguments)
+    if after is not None:
+        where += f' AND ({", ".join(keys)}) > {tcsql.question_marks(len(keys))}'
+        arguments += key_arguments + list(after)
+
+    sort_columns = [f'sort_{i}' for i in range(len(keys))]
+    # the page is found first, and its rows are then joined with their tags and
+    # playlists, one row per combination; rows of the same comic are adjacent
+    query = f'''
+        SELECT comics.*, comic_tags.tag, playlist_items.playlist
+        FROM (
+            SELECT {_comic_columns},
+                   {', '.join(f'{key} AS {column}' for key, column in zip(keys, sort_columns))}
+            FROM comics
+            WHERE {where}
+            ORDER BY {', '.join(sort_columns)}
+            LIMIT ? OFFSET ?
+        ) AS comics
+        LEFT OUTER JOIN
+            comic_tags ON comic_tags.comic = comics.unique_identifier
+        LEFT OUTER JOIN
+            playlist_items ON playlist_items.comic = comics.unique_identifier
+        ORDER BY {', '.join(sort_columns)}
+    '''
+    arguments = key_arguments + arguments + [-1 if limit is None else limit, offset]
+
+    rows = manager.iterate(query, arguments)
+    for _, comic_rows in itertools.groupby(rows, key=lambda row: row[1]):
+        tags, playlists = set(), set()
+        for row in comic_rows:
+            if row[-2] is not None:
+                tags.add(row[-2])
+            if row[-1] is not None:
+                playlists.add(row[-1])
+        yield Comic(row[:8], sorted(tags), sorted(playlists))
+
+def _close_connections(connections: _Connections):
+    connections.pool.close()
+    if connections.snapshot is not None:
+        connections.snapshot.close()
+
 default_appdata = os.path.expandvars(r'%LOCALAPPDATA%\Packages\7417df09-6e90-4c8e-94f9-82950aaef08b_jh3a8zm8ky434\LocalState')
 
 class ReadOnlyManager:
@@ -128,13 +306,188 @@ class ReadOnlyManager:
     thumbnail_folder: str
 
     def __init__(self, profile_path: str, database_path: str,
-                 thumbnail_folder: str):
+                 thumbnail_folder: str, pool_size: int = 4,
+                 fulltext_index_path: Optional[str] = None,
+                 result_cache_size: Optional[int] = 64 * 1024 * 1024,
+                 file_cache: Union[None, bool, str] = None,
+                 snapshot=False, snapshot_interval: Optional[float] = 5.0,
+                 metrics: Optional[QueryMetrics] = None):
+        ''' Queries share a pool of up to `pool_size` idle read-only connections
+            to the database, which are closed by `close()` (or by leaving a
+            `with` block).
+
+            Titles and authors are searched with the full-text index (see
+            `tc.comics_db.fulltext`) if it has been built, and is up to date with
+            the library (otherwise, a warning is given, and they are searched
+            without it).
+
+            The results of `search_comics` are cached, up to an estimated
+            `result_cache_size` bytes (None or 0 to disable), until the library
+            changes (see `tc.comics_db.result_cache`).
+
+            The files of comics are listed from a cache (see `tc.comics_db.filecache`)
+            in the user cache folder if `file_cache` is True, or in another file if
+            it is a path. By default (None or False), they are listed anew every
+            time, and nothing is written outside the given paths.
+
+            With `snapshot`, the whole database is copied into memory (see
+            `tc.sqlite.Snapshot`), and read from there instead, for when it's on a
+            slow (such as a synced) drive. Every `snapshot_interval` seconds (unless
+            None), the file is checked for changes, and if it changed, a new copy is
+            made in the background, and replaces the old one once complete. Queries
+            run on either the old or the new copy, and never wait for one.
+
+            With `metrics`, every query's time, rows and (if slow) plan are recorded
+            into it (see `tc.sqlite.metrics`). '''
         self.profile = ReadOnlyProfile.from_file(profile_path)
         self.thumbnail_folder = thumbnail_folder
         self.database_path = database_path
+        self.fulltext_index = FullTextIndex(database_path, fulltext_index_path)
+        self.snapshot = snapshot
+        self.metrics = metrics
+        self._pool_size = pool_size
+        self._swap_lock = threading.Lock()
+        self._retired: List[_Connections] = []
+        self._connections = self._make_connections()
+        # (connections, version, usable) of the last full-text index check
+        # that needed a library_fingerprint
+        self._fulltext_checked: Optional[Tuple[_Connections, Any, bool]] = None
+        self._results = None
+        if result_cache_size:
+            # a snapshot only changes when it's replaced, which clears the cache
+            watched = None if snapshot else database_path
+            self._results = ResultCache(watched, _result_size, result_cache_size)
+        if file_cache is None or file_cache is False:
+            self._files = None
+        else:
+            self._files = FileListCache(database_path, None if file_cache is True else file_cache)
+
+        self._stopped = threading.Event()
+        self._watcher = None
+        if snapshot and snapshot_interval is not None:
+            self._watcher = threading.Thread(
+                target=self._watch_snapshot, args=[snapshot_interval], name='snapshot refresh', daemon=True
+            )
+            self._watcher.start()
+
+    def _make_connections(self) -> _Connections:
+        use_fulltext = self.fulltext_index.exists()
+        fulltext_version = self.fulltext_index.library_version() if use_fulltext else None
+        fulltext_fingerprint = self.fulltext_index.library_fingerprint() if use_fulltext else None
+        snapshot = version = None
+        open_database = lambda: tcsql.connect_readonly(self.database_path, metrics=self.metrics)
+        if self.snapshot:
+            version = tcsql.database_version(self.database_path)
+            snapshot = tcsql.Snapshot(self.database_path)
+            open_database = lambda: snapshot.connect(self.metrics)
+
+        def connect() -> tcsql.SQLiteManager:
+            manager = open_database()
+            manager.conn.create_function('seeded_random', 2, seeded_random, deterministic=True)
+            if use_fulltext:
+                self.fulltext_index.attach(manager.conn)
+            return manager
+
+        return _Connections(tcsql.ConnectionPool(connect, size=self._pool_size), use_fulltext, snapshot, version,
+                            fulltext_version, fulltext_fingerprint)
+
+    def _use_fulltext(self, connections: _Connections) -> bool:
+        ''' Returns whether searches on connections can use the full-text index:
+            if it's attached, and made from the library they read. Unless the
+            library file is as it was when the index was updated, its rows are
+            fingerprinted to check, once per version of the file. '''
+        if not connections.fulltext:
+            return False
+
+        if connections.snapshot is not None:
+            current = connections.version
+        else:
+            current = tcsql.database_version(self.database_path)
+        if current == connections.fulltext_version:
+            return True
+
+        checked = self._fulltext_checked
+        if checked is None or checked[0] is not connections or checked[1] != current:
+            with connections.pool.connection() as manager:
+                usable = library_fingerprint(manager.conn) == connections.fulltext_fingerprint
+            checked = self._fulltext_checked = (connections, current, usable)
+        if checked[2]:
+            return True
+
+        warnings.warn('the full-text index is out of date, and will not be used until '
+                      'update_fulltext_index() is called')
+        return False
+
+    def _replace_connections(self):
+        ''' Replaces the connections (and snapshot) with new ones, which are
+            used from then on. '''
+        with self._swap_lock:
+            old, self._connections = self._connections, self._make_connections()
+            self._retired.append(old)
+        if self._results is not None:
+            self._results.clear()
+
+        timer = threading.Timer(_retire_after, self._close_retired, [old])
+        timer.daemon = True
+        timer.start()
+
+    def _close_retired(self, connections: _Connections):
+        with self._swap_lock:
+            if not any(retired is connections for retired in self._retired):
+                return  # closed already
+            self._retired = [retired for retired in self._retired if retired is not connections]
+        _close_connections(connections)
+
+    @property
+    def _pool(self) -> tcsql.ConnectionPool:
+        return self._connections.pool
+
+    def update_fulltext_index(self, rebuild=False) -> int:
+        ''' Builds or updates the full-text index (see `FullTextIndex.update`),
+            which is used from then on. '''
+        changes = self.fulltext_index.update(rebuild)
+        self._replace_connections()
+        return changes
+
+    def refresh_snapshot(self, force=False) -> bool:
+        ''' Copies the database into memory again if it changed since the
+            snapshot was taken (or if forced), and returns whether it did. The
+            copy is made while queries continue on the current snapshot. '''
+        if not self.snapshot:
+            raise ValueError('not in snapshot mode')
+        if not force and tcsql.database_version(self.database_path) == self._connections.version:
+            return False
+        self._replace_connections()
+        return True
+
+    def _watch_snapshot(self, interval: float):
+        while not self._stopped.wait(interval):
+            try:
+                self.refresh_snapshot()
+            except (sqlite3.Error, OSError):
+                pass  # such as while the file is being replaced; tried again next time
+
+    def close(self):
+        self._stopped.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._swap_lock:
+            connections, self._retired = [self._connections, *self._retired], []
+        for connection in connections:
+            _close_connections(connection)
+        if self._results is not None:
+            self._results.close()
+        if self._files is not None:
+            self._files.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
     @staticmethod
-    def try_open(profile_name: str, appdata: str = default_appdata) -> ReadOnlyManager:
+    def try_open(profile_name: str, appdata: str = default_appdata, pool_size: int = 4) -> ReadOnlyManager:
         profile_path = os.path.join(appdata, 'Profiles', f'{profile_name}.profile.json')
         db_path = os.path.join(appdata, 'Databases', f'{profile_name}.library.db')
         thumbnails_dir = os.path.join(appdata, 'Thumbnails')
@@ -142,7 +495,7 @@ class ReadOnlyManager:
         if not (os.path.isfile(profile_path) and os.path.isfile(db_path) and os.path.isdir(thumbnails_dir)):
             raise ValueError(f'Could not find profile {profile_name} in {appdata}')
 
-        return ReadOnlyManager(profile_path, db_path, thumbnails_dir)
+        return ReadOnlyManager(profile_path, db_path, thumbnails_dir, pool_size)
 
 
     SearchResult = Tuple[List[Comic], Dict[str, int], Dict[str, int], Dict[str, int]]
@@ -153,9 +506,12 @@ class ReadOnlyManager:
         override_categories: Optional[List[str]] = None,
         override_authors: Optional[List[str]] = None,
         override_tags: Optional[List[str]] = None,
-        override_playlists: Optional[List[str]] = None
+        override_playlists: Optional[List[str]] = None,
+        **options
     ) -> SearchResult:
-        ''' The overrides serve the comics_db webapp for now. Perhaps we should figure out a better way. '''
+        ''' The overrides serve the comics_db webapp for now. Perhaps we should figure out a better way.
+
+            Other options (such as sorting and paging) are passed on to `search_comics`. '''
         search, categories, authors, tags, playlists, loved = compile_search(search_string)
 
         search_string = search[0] if len(search) > 0 else None
@@ -166,8 +522,9 @@ class ReadOnlyManager:
         tags = override_tags or tags
         playlists = override_playlists or playlists
 
-        return self.search_comics(search_string, categories, authors, tags, playlists, loved_only)
+        return self.search_comics(search_string, categories, authors, tags, playlists, loved_only, **options)
 
+    @traced(record_args=True)
     def search_comics(
         self,
         search_string: Optional[str] = None,
@@ -175,132 +532,259 @@ class ReadOnlyManager:
         authors: List[str] = [],
         tags: List[str] = [],
         playlists: List[str] = [],
-        loved_only=False
+        loved_only=False,
+        facets_top: Optional[int] = None,
+        sort: Optional[str] = None,
+        seed: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[Tuple[Any, ...]] = None
     ) -> SearchResult:
         ''' returns a 4-tuple ([comics], {category_name: id}, {author_name: id}, {tag_name: id})
-            Note that authors, tags, categories need to be exact matches, but search string doesn't.'''
-        with tcsql.connect(self.database_path) as manager:
-            query = f"""
-                SELECT
-                    comics.path,
-                    comics.unique_identifier,
-                    comics.title,
-                    comics.author,
-                    comics.category,
-                    comics.display_title,
-                    comics.loved,
-                    comics.date_added,
-                    group_concat(comic_tags.tag),
-                    group_concat(playlist_items.playlist)
-                FROM
-                    comics
-                LEFT OUTER JOIN
-                    comic_tags ON comic_tags.comic = comics.unique_identifier
-                LEFT OUTER JOIN
-                    playlist_items ON playlist_items.comic = comics.unique_identifier
-                WHERE
-            {     f'comics.category IN {tcsql.question_marks(len(categories))} AND ' if categories != [] else '' }
-            {     f'comics.author IN {tcsql.question_marks(len(authors))} AND ' if authors != [] else '' }
-            {     f'comic_tags.tag IN {tcsql.question_marks(len(tags))} AND ' if tags != [] else ''}
-            {     f'playlist_items.playlist IN {tcsql.question_marks(len(playlists))} AND ' if playlists != [] else ''}
-            {      'loved = 1 AND ' if loved_only else '' }
-            {   '''(comics.display_title COLLATE UTF8_GENERAL_CI LIKE ? OR
-                       (comics.display_title IS NULL AND comics.title COLLATE UTF8_GENERAL_CI LIKE ?) OR
-                        comics.author COLLATE UTF8_GENERAL_CI LIKE ? OR
-                        comic_tags.tag = ?) AND '''
-                    if search_string is not None else '' }
-                    active = 1
-                GROUP BY comics.unique_identifier
-            """
-
-            arguments = categories + authors + tags + playlists
-            if search_string is not None:
-                arguments += [f'%{search_string}%'] * 3 + [search_string]
-
-            result = manager.execute(query, arguments)
-
-            comics = []
-            category_dict: Counter = Counter()
-            author_dict: Counter = Counter()
-            tag_dict: Counter = Counter()
-
-            for *data, tag_string, playlist_string in result:
-                assert len(data) == 8
-                tags = sorted(set(tag_string.split(','))) if tag_string is not None else []
-                playlists = sorted(set(playlist_string.split(','))) if playlist_string is not None else []
-                comic = Comic(data, tags, playlists)
-
-                comics.append(comic)
-                category_dict[comic.category] += 1
-                author_dict[comic.author] += 1
-                for tag in comic.tags:
-                    tag_dict[tag] += 1
-
-            return comics, category_dict, author_dict, tag_dict
+            Note that authors, tags, categories need to be exact matches (ignoring case,
+            as the viewer does), but search string doesn't.
+
+            Comics are sorted by `sort` (one of 'title', 'category', 'random', 'date added' or
+            'author'; see `Comic.get_sort_key`), with 'random' being the same order for the
+            same `seed`. Pages of `limit` comics can be requested either by `offset`, or
+            (faster, and stable while the library changes) `after` a comic's
+            `sort_cursor(sort, seed)`. Paging a random order needs a seed (a ValueError
+            is raised otherwise).
+
+            The counts (see `search_facets`) are of every matching comic, not only the
+            page, and are limited to the `facets_top` most common of each.
+
+            Results are cached (except in a random order without a seed), and the
+            comics in them are shared between calls, so they shouldn't be modified. '''
+        results = self._results
+        if sort == 'random' and seed is None:
+            results = None
+
+        if results is not None:
+            key = (search_string, _normalized(categories), _normalized(authors),
+                   _normalized(tags), _normalized(playlists), bool(loved_only), facets_top, sort, seed,
+                   limit, offset, None if after is None else tuple(after))
+            found, result, version = results.lookup(key)
+            if found:
+                comics, category_dict, author_dict, tag_dict = result
+                return list(comics), Counter(category_dict), Counter(author_dict), Counter(tag_dict)
+
+        # only after the lookup, so that results from connections replaced in
+        # the meantime aren't stored (see ResultCache.store)
+        connections = self._connections
+        condition = self._search_condition(
+            self._use_fulltext(connections), search_string, categories, authors, tags, playlists, loved_only
+        )
 
-    def get_comic(self, unique_identifier: str) -> Optional[Comic]:
-        with tcsql.connect(self.database_path) as manager:
-            result = manager.execute(
-                f'''SELECT path, unique_identifier, title, author, category,
-                           display_title, loved, date_added
-                    FROM comics WHERE unique_identifier = ?''',
-                [unique_identifier]
+        with connections.pool.connection() as manager:
+            comics = list(_read_comics(manager, condition, sort, seed, limit, offset, after))
+
+            category_dict, author_dict, tag_dict = (
+                Counter(dict(manager.execute(query, arguments)))
+                for query, arguments in _facet_queries(condition, facets_top)
             )
 
-            if len(result) == 0:
-                return None
+        if results is not None:
+            results.store(key, (tuple(comics), category_dict.copy(), author_dict.copy(), tag_dict.copy()), version)
 
-            return Comic(result[0], self._get_tags(unique_identifier), self._get_playlists(unique_identifier))
+        return comics, category_dict, author_dict, tag_dict
 
-    def _get_tags(self, unique_identifier: str) -> List[str]:
-        with tcsql.connect(self.database_path) as manager:
-            tags = manager.execute(
-                f'SELECT tag FROM comic_tags WHERE comic = ?',
-                [unique_identifier]
-            )
+    def iter_comics(
+        self,
+        search_string: Optional[str] = None,
+        categories: List[str] = [],
+        authors: List[str] = [],
+        tags: List[str] = [],
+        playlists: List[str] = [],
+        loved_only=False,
+        sort: Optional[str] = None,
+        seed: Optional[int] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        after: Optional[Tuple[Any, ...]] = None
+    ) -> Iterator[Comic]:
+        ''' Yields the comics found by `search_comics` (without counts) as they are
+            read, keeping a pooled connection until the iterator is exhausted or
+            closed. '''
+        connections = self._connections
+        condition = self._search_condition(
+            self._use_fulltext(connections), search_string, categories, authors, tags, playlists, loved_only
+        )
 
-            return [t[0] for t in tags]
+        with connections.pool.connection() as manager:
+            yield from _read_comics(manager, condition, sort, seed, limit, offset, after)
+
+    FacetResult = Tuple[Dict[str, int], Dict[str, int], Dict[str, int]]
+
+    @traced(record_args=True)
+    def search_facets(
+        self,
+        search_string: Optional[str] = None,
+        categories: List[str] = [],
+        authors: List[str] = [],
+        tags: List[str] = [],
+        playlists: List[str] = [],
+        loved_only=False,
+        top: Optional[int] = None,
+        parallel=False
+    ) -> FacetResult:
+        ''' Returns the number of comics matching the search (see `search_comics`)
+            in each category, by each author and with each tag, as 3 dicts
+            ordered from most to least common, of at most `top` items each.
+
+            The counts are computed in SQL, and with `parallel`, on separate
+            pooled connections at once. '''
+        connections = self._connections
+        condition = self._search_condition(
+            self._use_fulltext(connections), search_string, categories, authors, tags, playlists, loved_only
+        )
+        queries = _facet_queries(condition, top)
 
-    def _get_playlists(self, unique_identifier: str) -> List[str]:
-        with tcsql.connect(self.database_path) as manager:
-            tags = manager.execute(
-                'SELECT playlist FROM playlist_items WHERE comic = ?',
-                [unique_identifier]
+        def count(query: Tuple[str, List[Any]]) -> Dict[str, int]:
+            with connections.pool.connection() as manager:
+                return Counter(dict(manager.execute(*query)))
+
+        if parallel:
+            with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+                category_dict, author_dict, tag_dict = executor.map(count, queries)
+        else:
+            category_dict, author_dict, tag_dict = map(count, queries)
+
+        return category_dict, author_dict, tag_dict
+
+    @staticmethod
+    def _search_condition(
+        fulltext: bool,
+        search_string: Optional[str],
+        categories: List[str],
+        authors: List[str],
+        tags: List[str],
+        playlists: List[str],
+        loved_only: bool
+    ) -> _Condition:
+        ''' Returns the condition on the comics table that selects the results of
+            a search. Tags and playlists are filtered by subqueries rather than
+            joins, so matching comics keep all their tags. '''
+        clauses = ['comics.active = 1']
+        arguments: List[Any] = []
+
+        # names are matched case folded, as in _facet_queries
+        if categories != []:
+            clauses.append(f'casefold(comics.category) IN {tcsql.question_marks(len(categories))}')
+            arguments += map(tcsql.casefold, categories)
+        if authors != []:
+            clauses.append(f'casefold(comics.author) IN {tcsql.question_marks(len(authors))}')
+            arguments += map(tcsql.casefold, authors)
+        if tags != []:
+            clauses.append(
+                'comics.unique_identifier IN '
+                f'(SELECT comic FROM comic_tags WHERE casefold(tag) IN {tcsql.question_marks(len(tags))})'
+            )
+            arguments += map(tcsql.casefold, tags)
+        if playlists != []:
+            clauses.append(
+                'comics.unique_identifier IN '
+                f'(SELECT comic FROM playlist_items WHERE playlist IN {tcsql.question_marks(len(playlists))})'
             )
+            arguments += playlists
+        if loved_only:
+            clauses.append('comics.loved = 1')
+
+        if search_string is not None:
+            # titles and authors are compared case folded, either from the full-text
+            # index (see tc.comics_db.fulltext) or with casefold() on every row
+            folded_search_string = tcsql.casefold(search_string)
+            if fulltext and len(folded_search_string) >= min_query_length:
+                text_clause = search_clause
+                arguments += [match_expression(folded_search_string)]
+            elif fulltext:
+                # trigrams can't find shorter strings
+                text_clause = short_search_clause
+                arguments += [f'%{folded_search_string}%'] * 2
+            else:
+                text_clause = '''(casefold(comics.display_title) LIKE ? OR
+                                     (comics.display_title IS NULL AND casefold(comics.title) LIKE ?) OR
+                                      casefold(comics.author) LIKE ?)'''
+                arguments += [f'%{folded_search_string}%'] * 3
+
+            clauses.append(
+                f'({text_clause} OR comics.unique_identifier IN (SELECT comic FROM comic_tags WHERE tag = ?))'
+            )
+            arguments.append(search_string)
+
+        return _Condition(' AND '.join(clauses), arguments)
 
-            return [t[0] for t in tags]
+    def get_comic(self, unique_identifier: str) -> Optional[Comic]:
+        return self.get_comics([unique_identifier])[0]
+
+    def get_comics(self, unique_identifiers: Iterable[str]) -> List[Optional[Comic]]:
+        ''' Returns the comics with the given unique identifiers, in the same
+            order (with None for those that don't exist).
+
+            Their rows, tags and playlists are read by one query each, for up to
+            `_max_variables` comics at a time, on a single pooled connection. '''
+        unique_identifiers = list(unique_identifiers)
+        wanted = list(dict.fromkeys(unique_identifiers))
+        rows: Dict[str, Any] = {}
+        tags: Dict[str, List[str]] = {}
+        playlists: Dict[str, List[str]] = {}
+
+        with self._pool.connection() as manager:
+            for i in range(0, len(wanted), _max_variables):
+                chunk = wanted[i:i + _max_variables]
+                marks = tcsql.question_marks(len(chunk))
+                for row in manager.execute(
+                    f'SELECT {_comic_columns} FROM comics WHERE unique_identifier IN {marks}', chunk
+                ):
+                    rows[row[1]] = row
+                for comic, tag in manager.execute(
+                    f'SELECT comic, tag FROM comic_tags WHERE comic IN {marks}', chunk
+                ):
+                    tags.setdefault(comic, []).append(tag)
+                for comic, playlist in manager.execute(
+                    f'SELECT comic, playlist FROM playlist_items WHERE comic IN {marks}', chunk
+                ):
+                    playlists.setdefault(comic, []).append(playlist)
+
+        return [
+            Comic(rows[uid], tags.get(uid, []), playlists.get(uid, [])) if uid in rows else None
+            for uid in unique_identifiers
+        ]
 
     def get_all_tags(self) -> Dict[str, int]:
-        with tcsql.connect(self.database_path) as manager:
+        with self._pool.connection() as manager:
             return dict(manager.execute(
-                'SELECT tag, COUNT(*) FROM comic_tags GROUP BY tag'
+                'SELECT tag, COUNT(*) FROM comic_tags GROUP BY casefold(tag)'
             ))
 
     def get_all_authors(self) -> Dict[str, int]:
-        with tcsql.connect(self.database_path) as manager:
+        with self._pool.connection() as manager:
             return dict(manager.execute(
-                'SELECT author, COUNT(*) FROM comics GROUP BY author'
+                'SELECT author, COUNT(*) FROM comics GROUP BY casefold(author)'
             ))
 
     def get_all_categories(self) -> Dict[str, int]:
-        with tcsql.connect(self.database_path) as manager:
+        with self._pool.connection() as manager:
             return dict(manager.execute(
-                'SELECT category, COUNT(*) FROM comics GROUP BY category'
+                'SELECT category, COUNT(*) FROM comics GROUP BY casefold(category)'
             ))
 
     def get_subworks(self, comic: Comic) -> List[Tuple[str, str]]:
         ''' Returns a list of tuples (subwork_path, first_file_path) '''
         subworks = []
         for path in tc.utils.listdir(comic.path):
-            files = self.get_files_from_folder(os.path.join(comic.path, path))
-            if (len(files)) > 0:
-                subworks.append((path, files[0]))
+            first_file = self.get_first_file_from_folder(os.path.join(comic.path, path))
+            if first_file is not None:
+                subworks.append((path, first_file))
         return subworks
 
     def get_files(self, comic: Comic) -> List[str]:
         return self.get_files_from_folder(comic.path)
 
     def get_files_from_folder(self, path: str) -> List[str]:
+        if self._files is not None:
+            return self._files.list_files(path, self.profile.work_traversal_depth, self.profile.extensions)
+
         return list(tc.subfiles.get_elements(
             path,
             depth=self.profile.work_traversal_depth,
@@ -308,6 +792,14 @@ class ReadOnlyManager:
             sort=natsorted
         ))
 
+    def get_first_file_from_folder(self, path: str) -> Optional[str]:
+        ''' Returns the first of `get_files_from_folder(path)`, or None, without
+            listing the rest. '''
+        if self._files is not None:
+            return self._files.first_file(path, self.profile.work_traversal_depth, self.profile.extensions)
+
+        return first_file(path, self.profile.work_traversal_depth, self.profile.extensions)
+
     def open(self, comic: Comic):
         files = self.get_files(comic)
         if self.profile.default_application is None:
@@ -0,0 +1,193 @@
+''' A persistent cache of the files in comic folders, kept per profile in the
+    user cache folder.
+
+    Listing a comic means walking its folder and natural sorting the names
+    found. An entry keeps the sorted list, with the modification time of
+    every folder walked to make it, and is valid while none of them changed
+    (adding, removing or renaming a file changes its folder's mtime). Checking
+    an entry takes a stat per folder.
+
+    Usage:
+        cache = FileListCache('library.db')
+        files = cache.list_files('D:/comics/title', 2, ['.jpg', '.png'])
+        first = cache.first_file('D:/comics/title/chapter 1', 2, ['.jpg', '.png'])
+'''
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+from natsort import natsort_keygen, natsorted
+
+from tc.utils.fileutils import user_cache_dir
+
+Listing = Tuple[List[str], List[Tuple[str, int]]]
+
+_natural_key = natsort_keygen()
+
+
+def default_cache_path(database_path: str) -> str:
+    ''' Returns where the file lists of database_path's profile are kept by
+        default, named as in `tc.comics_db.fulltext.default_index_path`. '''
+    database_path = os.path.abspath(database_path)
+    name, _ = os.path.splitext(os.path.basename(database_path))
+    digest = zlib.crc32(os.path.normcase(database_path).encode('utf-8'))
+    return os.path.join(user_cache_dir('comics_db'), f'{name}-{digest:08x}.files.db')
+
+
+def walk_files(root: str, depth: int, extensions: Sequence[str]) -> Listing:
+    ''' Returns the items of root (up to depth folders deep) ending with one of
+        extensions, exactly as `tc.subfiles.get_elements(root, depth=depth,
+        filter=..., sort=natsorted)` finds them, but relative to root; and
+        (relative path, mtime) for every folder listed. '''
+    suffixes = tuple(extensions)
+    files: List[str] = []
+    folders: List[Tuple[str, int]] = []
+
+    def walk(relative: str, level: int):
+        # like os.walk, which skips folders that can't be listed, and doesn't
+        # follow symbolic links (but counts them as folders)
+        path = os.path.join(root, relative)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+            with os.scandir(path) as entries:
+                dirs, names, children = _classify(entries)
+        except OSError:
+            return
+
+        folders.append((relative, mtime))
+        for name in natsorted(dirs) + natsorted(names):
+            if name.endswith(suffixes):
+                files.append(os.path.join(relative, name))
+
+        if level < depth:
+            for name in children:
+                walk(os.path.join(relative, name), level + 1)
+
+    walk('', 0)
+    return files, folders
+
+
+def first_file(root: str, depth: int, extensions: Sequence[str]) -> Optional[str]:
+    ''' Returns the first of `walk_files(root, depth, extensions)`, joined to
+        root, (or None) without sorting or walking any further than needed. '''
+    suffixes = tuple(extensions)
+
+    def walk(path: str, level: int) -> Optional[str]:
+        try:
+            with os.scandir(path) as entries:
+                dirs, names, children = _classify(entries)
+        except OSError:
+            return None
+
+        for candidates in (dirs, names):
+            matches = [name for name in candidates if name.endswith(suffixes)]
+            if matches:
+                return os.path.join(path, min(matches, key=_natural_key))
+
+        if level < depth:
+            for name in children:
+                found = walk(os.path.join(path, name), level + 1)
+                if found is not None:
+                    return found
+        return None
+
+    return walk(root, 0)
+
+
+def _classify(entries: Iterable[os.DirEntry]) -> Tuple[List[str], List[str], List[str]]:
+    ''' Returns (folders, files, folders to walk into) in listing order. '''
+    dirs, names, children = [], [], []
+    for entry in entries:
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            is_dir = False
+        if is_dir:
+            dirs.append(entry.name)
+            if not entry.is_symlink():
+                children.append(entry.name)
+        else:
+            names.append(entry.name)
+    return dirs, names, children
+
+
+def _unchanged(root: str, folders: Iterable[Tuple[str, int]]) -> bool:
+    try:
+        return all(os.stat(os.path.join(root, relative)).st_mtime_ns == mtime for relative, mtime in folders)
+    except OSError:
+        return False
+
+
+class FileListCache:
+    ''' Safe to share between threads. Entries are saved as they are made. '''
+    path: str
+
+    def __init__(self, database_path: str, path: Optional[str] = None):
+        self.path = path or default_cache_path(database_path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                '''CREATE TABLE IF NOT EXISTS file_lists (
+                       root TEXT, depth INTEGER, extensions TEXT, files TEXT, folders TEXT,
+                       PRIMARY KEY (root, depth, extensions))'''
+            )
+
+    def lookup(self, root: str, depth: int, extensions: Sequence[str]) -> Optional[List[str]]:
+        ''' Returns the cached files of root, relative to it, if still up to date. '''
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT files, folders FROM file_lists WHERE root = ? AND depth = ? AND extensions = ?',
+                _key(root, depth, extensions)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        files, folders = json.loads(row[0]), json.loads(row[1])
+        if not _unchanged(root, folders):
+            return None
+        return files
+
+    def list_files(self, root: str, depth: int, extensions: Sequence[str]) -> List[str]:
+        ''' Returns the files of root as `walk_files` does (but joined to root),
+            from the cache if possible. '''
+        files = self.lookup(root, depth, extensions)
+        if files is None:
+            files, folders = walk_files(root, depth, extensions)
+            if folders:
+                with self._lock, self._connection:
+                    self._connection.execute(
+                        'INSERT OR REPLACE INTO file_lists VALUES (?, ?, ?, ?, ?)',
+                        [*_key(root, depth, extensions), json.dumps(files), json.dumps(folders)]
+                    )
+        return [os.path.join(root, file) for file in files]
+
+    def first_file(self, root: str, depth: int, extensions: Sequence[str]) -> Optional[str]:
+        ''' Returns the first of root's files: from the cache if possible,
+            otherwise without listing them all (or caching them). '''
+        files = self.lookup(root, depth, extensions)
+        if files is None:
+            return first_file(root, depth, extensions)
+        return os.path.join(root, files[0]) if files else None
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM file_lists')
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __enter__(self) -> 'FileListCache':
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _key(root: str, depth: int, extensions: Sequence[str]) -> List[object]:
+    return [os.path.normcase(os.path.abspath(root)), depth, '\0'.join(extensions)]
@@ -0,0 +1,214 @@
+''' An optional full-text index of comic titles and authors, kept in a sidecar
+    SQLite file apart from the library database, which is only ever read.
+
+    Titles and authors are indexed by FTS5 with the trigram tokenizer, which
+    matches any substring of at least 3 characters (including CJK text, which
+    has no spaces to split words at). They are stored case folded (see
+    tc.sqlite.casefold), and must be searched for case folded, which makes
+    shorter substrings quick to find too, with a plain LIKE.
+
+    The index records a fingerprint of the library rows it was made from (see
+    library_fingerprint), and isn't used once they change, until it's updated
+    again. It also records the version of the library file (see
+    tc.sqlite.database_version), which is cheap to check: while the file is
+    unchanged, so are the rows. The file also changes without them (such as
+    when its write-ahead log is checkpointed, or the viewer saves anything
+    else), and only then is the fingerprint taken again to compare.
+
+    Usage:
+        FullTextIndex('library.db').update()  # after the library changes
+        manager = ReadOnlyManager(profile, 'library.db', thumbnails)  # uses it
+'''
+import json
+import os
+import sqlite3
+import zlib
+from typing import Any, Optional, Tuple
+from urllib.request import pathname2url
+
+from tc.sqlite.manager import database_version, register_unicode_functions
+from tc.utils.fileutils import user_cache_dir
+
+# bumped whenever the schema changes, which causes a rebuild
+schema_version = 3
+
+# trigrams can't match anything shorter
+min_query_length = 3
+
+# the indexed rows are kept in fts_source, which the fts table indexes
+# (as external content) through triggers
+_schema = [
+    'CREATE TABLE index_info (key TEXT PRIMARY KEY, value TEXT)',
+    '''CREATE TABLE fts_source (
+           rowid INTEGER PRIMARY KEY,
+           unique_identifier TEXT UNIQUE,
+           title TEXT,
+           author TEXT
+       )''',
+    '''CREATE VIRTUAL TABLE comics_fts USING fts5(
+           title, author, content='fts_source', content_rowid='rowid', tokenize='trigram'
+       )''',
+    '''CREATE TRIGGER fts_source_insert AFTER INSERT ON fts_source BEGIN
+           INSERT INTO comics_fts (rowid, title, author) VALUES (new.rowid, new.title, new.author);
+       END''',
+    '''CREATE TRIGGER fts_source_delete AFTER DELETE ON fts_source BEGIN
+           INSERT INTO comics_fts (comics_fts, rowid, title, author)
+               VALUES ('delete', old.rowid, old.title, old.author);
+       END''',
+]
+
+_drop_schema = [
+    'DROP TRIGGER IF EXISTS fts_source_insert',
+    'DROP TRIGGER IF EXISTS fts_source_delete',
+    'DROP TABLE IF EXISTS comics_fts',
+    'DROP TABLE IF EXISTS fts_source',
+    'DROP TABLE IF EXISTS index_info',
+]
+
+# as in search_comics, the title searched is the display title, or the title
+# if there is none
+_library_rows = '''
+    SELECT unique_identifier, casefold(coalesce(display_title, title)) AS title,
+           casefold(author) AS author
+    FROM library.comics
+'''
+
+# what the indexed rows are made from; see library_fingerprint
+_fingerprint_rows = 'SELECT unique_identifier, display_title, title, author FROM {schema}.comics'
+
+# used in search queries, on connections with the index attached as fulltext,
+# with match_expression(casefold(text))
+search_clause = '''comics.unique_identifier IN (
+    SELECT unique_identifier FROM fulltext.fts_source WHERE rowid IN (
+        SELECT rowid FROM fulltext.comics_fts WHERE comics_fts MATCH ?))'''
+
+# for text shorter than min_query_length, with '%' + casefold(text) + '%' twice
+short_search_clause = '''comics.unique_identifier IN (
+    SELECT unique_identifier FROM fulltext.fts_source WHERE title LIKE ? OR author LIKE ?)'''
+
+
+def default_index_path(database_path: str) -> str:
+    ''' Returns where the index of database_path is kept by default: in the user
+        cache folder, named after the database and a hash of its path (since
+        every profile's database is named much the same). '''
+    database_path = os.path.abspath(database_path)
+    name, _ = os.path.splitext(os.path.basename(database_path))
+    digest = zlib.crc32(os.path.normcase(database_path).encode('utf-8'))
+    return os.path.join(user_cache_dir('comics_db'), f'{name}-{digest:08x}.fts.db')
+
+
+def sqlite_uri(path: str, mode: str) -> str:
+    return 'file:' + pathname2url(os.path.abspath(path)) + f'?mode={mode}'
+
+
+def library_fingerprint(connection: sqlite3.Connection, schema='main') -> Tuple[int, int]:
+    ''' Returns (count, checksum) of the library rows that the index is made
+        from (in schema, on connection), which changes whenever any of them do,
+        whatever order they're stored in. '''
+    count = checksum = 0
+    for row in connection.execute(_fingerprint_rows.format(schema=schema)):
+        count += 1
+        checksum += zlib.crc32(repr(row).encode('utf-8'))
+    return count, checksum
+
+
+def match_expression(text: str) -> str:
+    ''' Returns an FTS5 query matching text anywhere, taken literally. '''
+    return '"' + text.replace('"', '""') + '"'
+
+
+class FullTextIndex:
+    database_path: str
+    path: str
+
+    def __init__(self, database_path: str, path: Optional[str] = None):
+        self.database_path = database_path
+        self.path = path or default_index_path(database_path)
+
+    def exists(self) -> bool:
+        return os.path.isfile(self.path)
+
+    def library_version(self) -> Any:
+        ''' Returns the database_version of the library when the index was last
+            updated (comparable to a current one), or None if unknown. '''
+        return self._info('library_version')
+
+    def library_fingerprint(self) -> Optional[Tuple[int, int]]:
+        ''' Returns the library_fingerprint of the rows the index was last
+            updated from, or None if unknown. '''
+        return self._info('library_fingerprint')
+
+    def _info(self, key: str) -> Any:
+        try:
+            connection = sqlite3.connect(sqlite_uri(self.path, 'ro'), uri=True)
+        except sqlite3.Error:
+            return None
+        try:
+            version, = connection.execute('PRAGMA user_version').fetchone()
+            if version != schema_version:
+                return None
+            row = connection.execute('SELECT value FROM index_info WHERE key = ?', [key]).fetchone()
+        except sqlite3.Error:
+            return None
+        finally:
+            connection.close()
+
+        if row is None:
+            return None
+        return _version_from_json(json.loads(row[0]))
+
+    def attach(self, connection: sqlite3.Connection, name='fulltext'):
+        ''' Attaches the index, read-only, to a connection opened with uri=True. '''
+        connection.execute(f'ATTACH DATABASE ? AS {name}', [sqlite_uri(self.path, 'ro')])
+
+    def update(self, rebuild=False) -> int:
+        ''' Brings the index up to date with the library. Only comics that were
+            added, changed or removed are reindexed, unless rebuilding (or the
+            index is missing or from an older version).
+
+            Returns the number of rows removed and added (so a changed comic
+            counts twice). Searches see either the old or the new index. '''
+        # taken before reading, so changes made meanwhile make the index out of date
+        library_version = database_version(self.database_path)
+        connection = sqlite3.connect(sqlite_uri(self.path, 'rwc'), uri=True)
+        register_unicode_functions(connection)
+        try:
+            connection.execute('ATTACH DATABASE ? AS library', [sqlite_uri(self.database_path, 'ro')])
+            with connection:
+                connection.execute('BEGIN')
+                version, = connection.execute('PRAGMA main.user_version').fetchone()
+                if rebuild or version != schema_version:
+                    for statement in _drop_schema + _schema:
+                        connection.execute(statement)
+                    connection.execute(f'PRAGMA main.user_version = {schema_version}')
+
+                removed = connection.execute(
+                    f'''DELETE FROM fts_source WHERE rowid IN (
+                            SELECT s.rowid FROM fts_source s
+                            LEFT JOIN ({_library_rows}) c ON c.unique_identifier = s.unique_identifier
+                            WHERE c.unique_identifier IS NULL
+                               OR s.title IS NOT c.title OR s.author IS NOT c.author)'''
+                ).rowcount
+                added = connection.execute(
+                    f'''INSERT INTO fts_source (unique_identifier, title, author)
+                        {_library_rows}
+                        WHERE unique_identifier NOT IN (SELECT unique_identifier FROM fts_source)'''
+                ).rowcount
+                # read in the same transaction as the rows indexed
+                fingerprint = library_fingerprint(connection, 'library')
+                connection.executemany(
+                    'INSERT OR REPLACE INTO index_info VALUES (?, ?)',
+                    [('library_version', json.dumps(library_version)),
+                     ('library_fingerprint', json.dumps(fingerprint))]
+                )
+                return removed + added
+        finally:
+            connection.close()
+
+
+def _version_from_json(value: Any) -> Any:
+    # database_version and library_fingerprint are made of tuples, which json
+    # turns into lists
+    if isinstance(value, list):
+        return tuple(_version_from_json(item) for item in value)
+    return value
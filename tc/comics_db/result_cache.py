@@ -0,0 +1,83 @@
+''' A cache of search results, which is emptied whenever the library changes.
+
+    The library is only ever read here, but the comics app writes to it at any
+    time. Before every lookup, the cache checks `PRAGMA data_version` on a
+    connection of its own (which changes once anyone else commits), and the
+    modification times and sizes of the database and its write-ahead log
+    (which also catch the file being replaced, as when it's synced).
+
+    When searching a snapshot of the library instead, which only changes when
+    it's replaced, the cache is emptied by calling `clear`. '''
+import sqlite3
+import threading
+from typing import Any, Hashable, Optional, Tuple
+
+from tc.sqlite.manager import connect_readonly, database_version
+from tc.utils.caching import LRUCache
+
+Version = Tuple[Any, ...]
+
+
+class ResultCache:
+    ''' Keeps the most recently used results, up to an estimated maxweight
+        bytes (as given by weigh). Watches database_path for changes, if
+        given. Safe to share between threads. '''
+    database_path: Optional[str]
+
+    def __init__(self, database_path: Optional[str], weigh, maxweight: float = 64 * 1024 * 1024):
+        self.database_path = database_path
+        self._cache = LRUCache(maxsize=None, maxweight=maxweight, weigh=weigh)
+        self._lock = threading.Lock()
+        self._watcher = None
+        if database_path is not None:
+            self._watcher = connect_readonly(database_path, cache_size=0, mmap_size=0)
+        # counts clears, so results computed before one aren't stored after it
+        self._generation = 0
+        self._version: Optional[Version] = None
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any, Version]:
+        ''' Returns (found, result, version), clearing the cache first if the
+            library changed. Pass version on to `store`. '''
+        version = self._validate()
+        found, result = self._cache.lookup(key)
+        return found, result, version
+
+    def store(self, key: Hashable, result: Any, version: Version):
+        ''' Saves a result computed after `lookup` returned version, unless the
+            library has changed since. '''
+        with self._lock:
+            if version != self._version:
+                return
+            self._cache.set(key, result)
+
+    def _validate(self) -> Version:
+        with self._lock:
+            version = self._current_version()
+            if version != self._version:
+                self._cache.clear(stats=False)
+                self._version = version
+            return version
+
+    def _current_version(self) -> Version:
+        if self._watcher is None or self.database_path is None:
+            return self._generation,
+        try:
+            data_version, = self._watcher.execute('PRAGMA data_version')[0]
+        except sqlite3.Error:
+            data_version = None
+        return (self._generation, data_version, *database_version(self.database_path))
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._version = None
+            self._cache.clear(stats=False)
+
+    def info(self):
+        return self._cache.info()
+
+    def close(self):
+        with self._lock:
+            self._cache.clear()
+            if self._watcher is not None:
+                self._watcher.close()
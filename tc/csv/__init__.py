@@ -1 +1,10 @@
-from .csv import read, Csv, CsvItem
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.csv': ['read', 'Csv', 'CsvItem'],
+})
+
+if TYPE_CHECKING:
+    from .csv import read, Csv, CsvItem
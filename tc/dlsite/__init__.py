@@ -1,10 +1,19 @@
 ''' The subfiles module provides the ability to iterate through all
     files or folders in a directory and its subdirectories. '''
-from .webinterface import get_info as _get_info, find_code, get_search_suggestions
-from .caching import cached_get_info as _cached_get_info
-from .organizer import organize
+from typing import TYPE_CHECKING, Optional, Union
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, _lazy_all = lazy_exports(globals(), {
+    '.webinterface': ['find_code', 'get_search_suggestions'],
+    '.organizer': ['organize'],
+})
+__all__ = _lazy_all + ['get_info', 'info']
+
+if TYPE_CHECKING:
+    from .webinterface import find_code, get_search_suggestions
+    from .organizer import organize
 
-from typing import Union
 
 def get_info(rj_number: Union[int, str], caching=True, update=False, offline=False):
     '''
@@ -28,17 +37,23 @@ def get_info(rj_number: Union[int, str], caching=True, update=False, offline=Fal
     rj_code = _formalize(rj_number)
 
     if caching:
-        return _cached_get_info(rj_code, update, offline)
+        from .caching import cached_get_info
+        return cached_get_info(rj_code, update, offline)
 
     if offline:
         raise ValueError('cannot run in offline mode if caching is disabled')
 
-    return _get_info(rj_code)
+    from .webinterface import get_info as uncached_get_info
+    return uncached_get_info(rj_code)
 
 
-def info(rj_number: Union[int, str], caching=True):
+def info(rj_number: Union[int, str], caching=True, max_items: Optional[int] = 20,
+         max_value_length: Optional[int] = None, paged=True):
+    ''' Prints work info; long lists (such as sample images) are cut off after
+        max_items items, and output is paged in interactive terminals. '''
     from tc.utils import print_dict
-    print_dict(get_info(_formalize(rj_number), caching))
+    print_dict(get_info(_formalize(rj_number), caching),
+               max_items=max_items, max_value_length=max_value_length, paged=paged)
 
 
 def _formalize(rj_number: Union[int, str]) -> str:
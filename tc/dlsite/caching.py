@@ -1,6 +1,7 @@
 import os.path
 import sqlite3
 from . import webinterface
+from tc.utils.tracing import traced
 
 from typing import Dict, Any, Optional, List, Tuple
 
@@ -36,6 +37,7 @@ _auxiliary_info: List[Tuple[str, str, str]] = [
     (_voice, _voice_table, _voice),
 ]
 
+@traced(record_args=True)
 def cached_get_info(code: str, reset_cached=False, offline=False) -> Optional[Dict[str, Any]]:
     result = fetch_info(code)
     if reset_cached or result is None:
@@ -7,6 +7,7 @@ import tc.subfiles
 import tc.utils
 from .caching import cached_get_info
 from .webinterface import get_info as uncached_get_info
+from tc.utils.tracing import traced
 
 def rj_folder(pathname: str) -> bool:
     ''' Given a pathname, returns `True` if the path contains a root file named
@@ -26,6 +27,7 @@ def get_number(pathname: str) -> str:
 
 # main logic
 
+@traced(name='dlsite.organize')
 def organize(root_dir: str = os.path.curdir,
              caching: bool = True,
              info_file: Optional[str] = 'dlsite.txt',
@@ -1,3 +1,4 @@
+import copy
 import datetime
 import re
 import urllib.request
@@ -7,6 +8,8 @@ from urllib.error import URLError
 import bs4
 import requests
 
+from tc.utils.caching import memoize
+
 _code = 'code'
 _maker = 'maker'
 _title = 'title'
@@ -40,14 +43,11 @@ def get_info(code: str) -> Dict[str, Any]:
         work info for a particular work. '''
 
     try:
-        site = urllib.request.urlopen(site_link(code))
-        site_data = site.read().decode('utf-8')
+        site_data = _fetch_work_page(code)
     except URLError:
         print(f'Error: Could not access {site_link(code)}')
         return {}
 
-    site_data = process_html(site_data)
-
     page = bs4.BeautifulSoup(site_data, 'html.parser')
 
     info: Dict[str, Any] = {_code: code}
@@ -146,6 +146,14 @@ def get_info(code: str) -> Dict[str, Any]:
     return info
 
 
+# cached as the page text, so that every call parses a new (modifiable) result;
+# failures raise, and aren't cached
+@memoize(maxsize=64, ttl=600)
+def _fetch_work_page(code: str) -> str:
+    with urllib.request.urlopen(site_link(code)) as site:
+        return process_html(site.read().decode('utf-8'))
+
+
 def read_text(tag: bs4.Tag) -> str:
     ''' Using BeautifulSoup,
         read the text contained in a tag as plain text. '''
@@ -196,11 +204,22 @@ def get_search_suggestions(search_term: str) -> Dict[str, Any]:
             age_category: int = 'same as above'
         }
         ```
+
+        Raises requests.HTTPError if the api doesn't respond with success.
+        Responses are cached for 10 minutes, and copied for every call, so the
+        result can be modified.
     '''
+    return copy.deepcopy(_fetch_search_suggestions(search_term))
+
+
+# failed requests (and responses that aren't json) raise, and aren't cached
+@memoize(maxsize=256, ttl=600)
+def _fetch_search_suggestions(search_term: str) -> Dict[str, Any]:
     timestamp = int(datetime.datetime.now().timestamp() * 1000)
     response = requests.get(
         f'https://www.dlsite.com/suggest?term={search_term}&site=adult-jp&time={timestamp}'
     )
+    response.raise_for_status()
     return response.json()
 
 def find_code(name: str) -> Optional[str]:
@@ -1 +1,10 @@
-from .itunes import iTunes, all_songs, search_lyrics, play_first_with_lyrics
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.itunes': ['iTunes', 'all_songs', 'search_lyrics', 'play_first_with_lyrics'],
+})
+
+if TYPE_CHECKING:
+    from .itunes import iTunes, all_songs, search_lyrics, play_first_with_lyrics
@@ -1,4 +1,13 @@
-from .lyrics import convert_ruby
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.lyrics': ['convert_ruby'],
+})
+
+if TYPE_CHECKING:
+    from .lyrics import convert_ruby
 
 '''
 The following is copied from this modules design description,
@@ -1,2 +1,12 @@
-from .password import generate_password, auto_generate_password
-from .encrypt import (encrypt_file, decrypt_file, openssl)
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.password': ['generate_password', 'auto_generate_password'],
+    '.encrypt': ['encrypt_file', 'decrypt_file', 'openssl'],
+})
+
+if TYPE_CHECKING:
+    from .password import generate_password, auto_generate_password
+    from .encrypt import (encrypt_file, decrypt_file, openssl)
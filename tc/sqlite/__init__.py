@@ -1 +1,18 @@
-from .manager import SQLiteManager, connect
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.manager': [
+        'SQLiteManager', 'connect', 'connect_readonly', 'ConnectionPool', 'Snapshot', 'casefold',
+        'database_version', 'MeteredSQLiteManager'
+    ],
+    '.metrics': ['QueryMetrics', 'normalize_sql'],
+})
+
+if TYPE_CHECKING:
+    from .manager import (
+        SQLiteManager, connect, connect_readonly, ConnectionPool, Snapshot, casefold, database_version,
+        MeteredSQLiteManager
+    )
+    from .metrics import QueryMetrics, normalize_sql
@@ -1,6 +1,16 @@
+import functools
+import itertools
+import os
 import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import contextmanager
+from urllib.request import pathname2url
 
-from typing import Tuple, List, Any, Dict, Iterable, Sequence
+from typing import Tuple, List, Any, Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+from tc.sqlite.metrics import QueryMetrics, format_plan
 
 
 # you must be able to trust your table and column names! sanitization on
@@ -32,6 +42,20 @@ class SQLiteManager:
         self._cursor.execute(sql, parameters)
         return self._cursor.fetchall()
 
+    def iterate(self, sql: str, parameters: Iterable = [], batch_size=256) -> Iterator[Any]:
+        ''' Yields the rows of a query as they are fetched, batch_size at a time.
+            Other queries can run on the manager in the meantime. '''
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute(sql, parameters)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
     def executemany(self, sql: str, seq_of_parameters: Iterable[Iterable]) -> int:
         self._cursor.executemany(sql, seq_of_parameters)
         return self._cursor.lastrowid
@@ -93,9 +117,247 @@ class SQLiteManager:
         return query, arguments
 
 
-def connect(*args, **kwargs) -> SQLiteManager:
+class MeteredSQLiteManager(SQLiteManager):
+    ''' A SQLiteManager recording the statements run by execute, iterate and
+        executemany into metrics (see tc.sqlite.metrics). Made by connect and
+        connect_readonly when given metrics. '''
+    metrics: QueryMetrics
+
+    def __init__(self, conn: sqlite3.Connection, metrics: QueryMetrics):
+        super().__init__(conn)
+        self.metrics = metrics
+
+    def execute(self, sql: str, parameters: Iterable = []) -> List[Any]:
+        parameters = _reusable(parameters)
+        start = time.perf_counter_ns()
+        rows = super().execute(sql, parameters)
+        self.metrics.record(sql, time.perf_counter_ns() - start, len(rows),
+                            self._explainer(self._cursor, sql, parameters))
+        return rows
+
+    def iterate(self, sql: str, parameters: Iterable = [], batch_size=256) -> Iterator[Any]:
+        ''' As SQLiteManager.iterate, counting only the time spent in SQLite
+            (not in between batches), and recording the statement once the
+            iterator is exhausted or closed. '''
+        parameters = _reusable(parameters)
+        cursor = self.conn.cursor()
+        duration = rows = 0
+        explain = None
+        try:
+            start = time.perf_counter_ns()
+            cursor.execute(sql, parameters)
+            duration += time.perf_counter_ns() - start
+            explain = self._explainer(cursor, sql, parameters)
+            while True:
+                start = time.perf_counter_ns()
+                batch = cursor.fetchmany(batch_size)
+                duration += time.perf_counter_ns() - start
+                if not batch:
+                    return
+                rows += len(batch)
+                yield from batch
+        finally:
+            cursor.close()
+            self.metrics.record(sql, duration, rows, explain)
+
+    def executemany(self, sql: str, seq_of_parameters: Iterable[Iterable]) -> int:
+        start = time.perf_counter_ns()
+        result = super().executemany(sql, seq_of_parameters)
+        self.metrics.record(sql, time.perf_counter_ns() - start, max(self._cursor.rowcount, 0))
+        return result
+
+    def _explainer(self, cursor: sqlite3.Cursor, sql: str, parameters: Iterable) -> Optional[Callable[[], str]]:
+        ''' Returns what explains a statement just run on cursor, if it was a
+            query. (Other statements, such as CREATE TABLE, often can't be
+            prepared again once they've run.) '''
+        if cursor.description is None:
+            return None
+        return lambda: self._explain(sql, parameters)
+
+    def _explain(self, sql: str, parameters: Iterable) -> str:
+        try:
+            return format_plan(self.conn.execute('EXPLAIN QUERY PLAN ' + sql, parameters).fetchall())
+        except sqlite3.Error as e:
+            return f'(cannot explain: {e})'
+
+
+def _reusable(parameters: Iterable) -> Iterable:
+    # parameters may be an iterator, which executing the statement would use up
+    if isinstance(parameters, (list, tuple, dict)):
+        return parameters
+    return list(parameters)
+
+
+def _manager(connection: sqlite3.Connection, metrics: Optional[QueryMetrics]) -> SQLiteManager:
+    if metrics is None:
+        return SQLiteManager(connection)
+    return MeteredSQLiteManager(connection, metrics)
+
+
+def connect(*args, metrics: Optional[QueryMetrics] = None, **kwargs) -> SQLiteManager:
+    ''' Opens a connection as sqlite3.connect does, recording its statements
+        into metrics if given. '''
     connection = sqlite3.connect(*args, **kwargs)
-    return SQLiteManager(connection)
+    register_unicode_functions(connection)
+    return _manager(connection, metrics)
+
+
+# a few thousand titles, authors and tags make up most of what's compared
+@functools.lru_cache(maxsize=65536)
+def casefold(text: Optional[str]) -> Optional[str]:
+    ''' Returns text in NFKC form (so full-width letters become ASCII) and
+        case folded (so 'ß' matches 'SS'), for case-insensitive comparisons. '''
+    if text is None:
+        return None
+    return unicodedata.normalize('NFKC', text).casefold()
+
+
+# kept so that the viewer's databases, whose text columns declare this
+# collation, can be read at all; a comparison callback per pair of rows is
+# slow, so tc.comics_db compares casefold() of those columns instead
+def _compare_casefolded(a: str, b: str) -> int:
+    a, b = casefold(a), casefold(b)
+    return (a > b) - (a < b)
+
+
+def register_unicode_functions(connection: sqlite3.Connection):
+    ''' Registers what the comics viewer's databases (which are made on
+        Windows) expect, so they can be queried anywhere: the UTF8_GENERAL_CI
+        collation, and a casefold(text) function to match it, for
+        case-insensitive LIKE on any text (SQLite only folds ASCII). '''
+    connection.create_collation('UTF8_GENERAL_CI', _compare_casefolded)
+    connection.create_function('casefold', 1, casefold, deterministic=True)
+
+
+def connect_readonly(path: str, *, cache_size=-16384, mmap_size=256 * 1024 * 1024,
+                     metrics: Optional[QueryMetrics] = None) -> SQLiteManager:
+    ''' Opens path read-only (failing if it doesn't exist), for use from any
+        thread (one at a time).
+
+        cache_size is in pages, or in KiB if negative (the default is 16 MiB),
+        and mmap_size is in bytes (0 to disable memory-mapped reads). Statements
+        are recorded into metrics, if given. '''
+    uri = 'file:' + pathname2url(os.path.abspath(path)) + '?mode=ro'
+    connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    register_unicode_functions(connection)
+    connection.execute('PRAGMA query_only = ON')
+    connection.execute(f'PRAGMA cache_size = {int(cache_size)}')
+    connection.execute(f'PRAGMA mmap_size = {int(mmap_size)}')
+    return _manager(connection, metrics)
+
+
+def database_version(path: str) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[int, int]]]:
+    ''' Returns the modification times and sizes of a database and its
+        write-ahead log (None for files that don't exist), which change
+        whenever it's written to or replaced. '''
+    def version(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    return version(path), version(path + '-wal')
+
+
+class Snapshot:
+    ''' An in-memory copy of a database, made with the backup API (so it's
+        consistent even if the database is being written to). Connections to
+        it (see connect) can be used from any thread, and share the copy,
+        which lasts until it and they are all closed.
+
+        Usage:
+            snapshot = Snapshot('library.db')
+            pool = ConnectionPool(snapshot.connect)
+    '''
+    path: str
+    uri: str
+
+    _names = itertools.count()
+
+    def __init__(self, path: str):
+        self.path = path
+        self.uri = f'file:tc-snapshot-{next(Snapshot._names)}?mode=memory&cache=shared'
+        self._keeper = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        source = sqlite3.connect('file:' + pathname2url(os.path.abspath(path)) + '?mode=ro', uri=True)
+        try:
+            source.backup(self._keeper)
+        except sqlite3.Error:
+            self._keeper.close()
+            raise
+        finally:
+            source.close()
+
+    def connect(self, metrics: Optional[QueryMetrics] = None) -> SQLiteManager:
+        ''' Opens a read-only connection to the copy, as connect_readonly does
+            to a file. '''
+        connection = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+        register_unicode_functions(connection)
+        connection.execute('PRAGMA query_only = ON')
+        return _manager(connection, metrics)
+
+    def close(self):
+        ''' Frees the copy once the connections to it are closed too. '''
+        self._keeper.close()
+
+
+class ConnectionPool:
+    ''' A thread-safe pool of connections made by factory, which are reused
+        instead of opened for every query. At most size idle connections are
+        kept; more are opened (and closed once returned) if needed.
+
+        Usage:
+            pool = ConnectionPool(lambda: connect_readonly('library.db'))
+            with pool.connection() as manager:
+                manager.execute(...)
+            pool.close()
+    '''
+    def __init__(self, factory: Callable[[], SQLiteManager], size=4):
+        self.factory = factory
+        self.size = size
+        self._idle: List[SQLiteManager] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[SQLiteManager]:
+        with self._lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError('Cannot operate on a closed connection pool.')
+            manager = self._idle.pop() if self._idle else None
+
+        if manager is None:
+            manager = self.factory()
+
+        try:
+            yield manager
+        finally:
+            with self._lock:
+                keep = not self._closed and len(self._idle) < self.size
+                if keep:
+                    self._idle.append(manager)
+            if not keep:
+                manager.close()
+
+    def close(self):
+        ''' Closes the idle connections now, and the ones in use once they
+            are returned. '''
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+
+        for manager in idle:
+            manager.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
 
 
 def question_marks(count: int, parenthesized=True):
@@ -0,0 +1,143 @@
+''' Per-statement metrics for SQLite queries: how often each statement runs,
+    how long it takes, and how many rows it returns, with the query plan of
+    those that are slow.
+
+    Statements are grouped by their normalized text (see normalize_sql), so
+    that queries assembled with different numbers of parameters, or with
+    literals, count as one. Only connections opened with metrics (see
+    `tc.sqlite.connect`) are measured; others cost nothing extra.
+
+    Usage:
+        metrics = QueryMetrics(explain_threshold=0.05)
+        manager = ReadOnlyManager(..., metrics=metrics)
+        ...
+        print_dict(metrics.report(top=5))
+'''
+import functools
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from tc.utils.tracing import LatencyHistogram
+
+_string_literals = re.compile(r"'(?:[^']|'')*'")
+_number_literals = re.compile(r'\b\d+(?:\.\d+)?\b')
+_whitespace = re.compile(r'\s+')
+_commas = re.compile(r'\s*,\s*')
+_parameter_lists = re.compile(r'\bIN \(\?(?:, \?)*\)', re.IGNORECASE)
+
+# once this many distinct statements are recorded, the rest are counted together
+_other_statements = '(other statements)'
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    ''' Returns sql on one line, with literals replaced by ? and lists of
+        parameters (as in `IN (?, ?, ?)`) replaced by `IN (...)`. '''
+    sql = _string_literals.sub('?', sql)
+    sql = _number_literals.sub('?', sql)
+    sql = _whitespace.sub(' ', sql).strip()
+    sql = _commas.sub(', ', sql.replace('( ', '(').replace(' )', ')'))
+    return _parameter_lists.sub('IN (...)', sql)
+
+
+def format_plan(rows: Sequence[Sequence[Any]]) -> str:
+    ''' Returns the rows of EXPLAIN QUERY PLAN (id, parent, notused, detail)
+        as an indented tree, like the sqlite3 shell does. '''
+    depths = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth = depths[node] = depths.get(parent, -1) + 1
+        lines.append('  ' * depth + detail)
+    return '\n'.join(lines)
+
+
+class StatementMetrics:
+    ''' What was recorded of a normalized statement. '''
+    sql: str
+    latency: LatencyHistogram
+    rows: int
+    max_rows: int
+    plan: Optional[str]  # for the slowest run above the threshold, if any
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.latency = LatencyHistogram()
+        self.rows = 0
+        self.max_rows = 0
+        self.plan = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        ''' Summarizes the statement; all times are in milliseconds. '''
+        result = self.latency.to_dict()
+        result.pop('buckets', None)
+        result['rows'] = self.rows
+        result['max rows'] = self.max_rows
+        if self.plan is not None:
+            result['plan'] = self.plan
+        return result
+
+
+class QueryMetrics:
+    ''' Collects statement metrics from any number of connections, and
+        threads. Statements taking longer than explain_threshold seconds
+        (None to never explain) have their query plan captured. '''
+    explain_threshold: Optional[float]
+    max_statements: int
+    statements: Dict[str, StatementMetrics]
+
+    def __init__(self, explain_threshold: Optional[float] = 0.05, max_statements=1000):
+        self.explain_threshold = explain_threshold
+        self.max_statements = max_statements
+        self.statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, sql: str, duration: int, rows: int, explain: Optional[Callable[[], str]] = None):
+        ''' Records a run of sql, which took duration nanoseconds and returned
+            (or changed) rows rows. explain() returns its query plan, and is
+            called (outside the lock) if the run is slow enough to need it. '''
+        key = normalize_sql(sql)
+        with self._lock:
+            statement = self.statements.get(key)
+            if statement is None:
+                if len(self.statements) >= self.max_statements:
+                    key = _other_statements
+                    explain = None
+                statement = self.statements.get(key)
+                if statement is None:
+                    statement = self.statements[key] = StatementMetrics(key)
+
+            slowest = statement.latency.max is None or duration > statement.latency.max
+            statement.latency.add(duration)
+            statement.rows += rows
+            statement.max_rows = max(statement.max_rows, rows)
+
+        threshold = self.explain_threshold
+        if explain is not None and slowest and threshold is not None and duration > threshold * 1e9:
+            plan = explain()
+            with self._lock:
+                statement.plan = plan
+
+    def report(self, top: Optional[int] = 10, by='total') -> Dict[str, Dict[str, Any]]:
+        ''' Returns the `top` (or all) statements taking the most time in total
+            (or by 'mean', 'max' or 'count'), slowest first, as in
+            `tc.utils.tracing.Tracer.summary`. '''
+        if by not in ('total', 'mean', 'max', 'count'):
+            raise ValueError("by must be 'total', 'mean', 'max' or 'count'")
+
+        with self._lock:
+            summaries = [(sql, statement.to_dict()) for sql, statement in self.statements.items()]
+
+        summaries.sort(key=lambda item: item[1].get(by, 0), reverse=True)
+        return dict(summaries[:top])
+
+    def slow_statements(self) -> List[StatementMetrics]:
+        ''' Returns the statements whose query plans were captured, slowest first. '''
+        with self._lock:
+            slow = [statement for statement in self.statements.values() if statement.plan is not None]
+        slow.sort(key=lambda statement: statement.latency.max or 0, reverse=True)
+        return slow
+
+    def clear(self):
+        with self._lock:
+            self.statements = {}
@@ -1,4 +1,15 @@
 """ The subfiles module provides the ability to iterate through all
     files or folders in a directory and its subdirectories. """
 
-from .subfiles import get_dirs, get_elements, map_dirs, map_elements, Limit
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.subfiles': [
+        'get_dirs', 'get_elements', 'map_dirs', 'map_elements', 'Limit', 'IntervalSet'
+    ],
+})
+
+if TYPE_CHECKING:
+    from .subfiles import get_dirs, get_elements, map_dirs, map_elements, Limit, IntervalSet
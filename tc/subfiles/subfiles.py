@@ -1,10 +1,10 @@
 """ This file defines the subfiles_get class and its extensions, which
     provide iteration functionality subfiles and subfolders """
 import os
-from typing import Callable, Generic, Iterable, Iterator, Optional, TypeVar, Union
+from typing import Callable, Container, Generic, Iterable, Iterator, Optional, TypeVar, Union
 from natsort.natsort import natsorted
 
-from tc.utils import Limit
+from tc.utils.utils import IntervalSet, Limit
 
 # note: the complicated typing structure is for mypy. as the programmer, is doesn't really give us any information.
 T = TypeVar('T')
@@ -21,7 +21,8 @@ class subfiles_get(Generic[T], Iterable[T]):
 
         `depth`: a `range`-like object; only returns files in range;
                  depth=0 is equivalent to listdir;
-                 can only traverse into depths <= 255
+                 an `IntervalSet` (such as a `Limit`) can describe several
+                 ranges; other objects can only traverse into depths <= 255
                  (developer's note: this is an arbitrary number)
 
         `limit`: an `int`; the maximum number of files to walk
@@ -38,28 +39,36 @@ class subfiles_get(Generic[T], Iterable[T]):
     filter_func: Optional[Callable[..., bool]]
 
     def __init__(self, root: str = os.path.curdir,
-                 depth: Union[int, tuple[int, int], tuple[int, int, int], Limit, range] = Limit(),
+                 depth: Union[int, tuple[int, int], tuple[int, int, int], IntervalSet, range] = Limit(),
                  limit=None, filter=None, sort=None, topdown=True):
         self.root = os.path.abspath(root)
 
         if isinstance(depth, int):
-            depth_range: Union[Limit, range] = range(depth + 1)
+            depth_range: Container[int] = Limit(0, depth)
         elif isinstance(depth, tuple):
             if len(depth) >= 2:
                 l, r, *s = depth
-                depth_range = range(l, r + 1, *s)
+                depth_range = IntervalSet.from_range(range(l, r + 1, *s))
             else:
-                depth_range = range(*depth)
+                depth_range = IntervalSet.from_range(range(*depth))
+        elif isinstance(depth, range):
+            depth_range = IntervalSet.from_range(depth)
         else:
             depth_range = depth
 
         # used to optimize os.walk when topdown=True
-        ignore_deeper_than = None
-        for i in range(256):
-            if i in depth_range:
-                ignore_deeper_than = None
-            elif ignore_deeper_than is None and i not in depth_range:
-                ignore_deeper_than = i
+        ignore_deeper_than: Optional[int] = None
+        if isinstance(depth_range, IntervalSet):
+            if not depth_range:
+                ignore_deeper_than = 0
+            elif depth_range.max is not None:
+                ignore_deeper_than = int(depth_range.max) + 1
+        else:
+            for i in range(256):
+                if i in depth_range:
+                    ignore_deeper_than = None
+                elif ignore_deeper_than is None and i not in depth_range:
+                    ignore_deeper_than = i
 
         self.limit = limit
 
@@ -1,21 +1,60 @@
-from .utils import (
-    Limit, trace, simple_trace, encoding_analysis
-)
-from .fileutils import (
-    filesize, filesize_format, print_filesize, find, surface, explode, move, order,
-    surface_trace, listdir, sanitize_filename, reencode, rename, alternative_filename,
-    is_image, is_common_image, traverse_to_contents
-)
-from .images import (
-    waifu2x, image_size, upconvert
-)
-from .format import (
-    format_dict, format_table, format_list, print_dict, print_table, print_list,
-    shorten as shorten_string, is_cjk_fullwidth, color
-)
-from .avutils import (
-    convert, convert_video, split as split_video
-)
-from .winutils import (
-    prompt_errors, toast_notification
-)
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.utils': ['Limit', 'IntervalSet', 'trace', 'simple_trace', 'encoding_analysis'],
+    '.tracing': ['traced', 'tracer'],
+    '.caching': ['memoize', 'LRUCache'],
+    '.fileutils': [
+        'filesize', 'filesize_format', 'print_filesize', 'find', 'surface', 'explode',
+        'move', 'order', 'surface_trace', 'listdir', 'sanitize_filename', 'reencode',
+        'rename', 'alternative_filename', 'is_image', 'is_common_image',
+        'traverse_to_contents', 'reencode_all', 'user_cache_dir', 'plan_moves',
+        'execute_moves'
+    ],
+    '.encoding': ['fix_mojibake', 'detect_encoding', 'rank_reencodings'],
+    '.images': ['waifu2x', 'image_size', 'upconvert'],
+    '.format': [
+        'format_dict', 'format_table', 'format_list', 'print_dict', 'print_table',
+        'print_list', 'format_dict_lines', 'format_table_lines', 'format_list_lines',
+        'page', 'shorten as shorten_string', 'shorten_many', 'char_width',
+        'is_cjk_fullwidth', 'color'
+    ],
+    '.avutils': ['convert', 'convert_video', 'split as split_video'],
+    '.winutils': ['prompt_errors', 'toast_notification'],
+})
+
+if TYPE_CHECKING:
+    from .utils import (
+        Limit, IntervalSet, trace, simple_trace, encoding_analysis
+    )
+    from .tracing import (
+        traced, tracer
+    )
+    from .caching import (
+        memoize, LRUCache
+    )
+    from .fileutils import (
+        filesize, filesize_format, print_filesize, find, surface, explode, move, order,
+        surface_trace, listdir, sanitize_filename, reencode, rename, alternative_filename,
+        is_image, is_common_image, traverse_to_contents, reencode_all, user_cache_dir,
+        plan_moves, execute_moves
+    )
+    from .encoding import (
+        fix_mojibake, detect_encoding, rank_reencodings
+    )
+    from .images import (
+        waifu2x, image_size, upconvert
+    )
+    from .format import (
+        format_dict, format_table, format_list, print_dict, print_table, print_list,
+        format_dict_lines, format_table_lines, format_list_lines, page,
+        shorten as shorten_string, shorten_many, char_width, is_cjk_fullwidth, color
+    )
+    from .avutils import (
+        convert, convert_video, split as split_video
+    )
+    from .winutils import (
+        prompt_errors, toast_notification
+    )
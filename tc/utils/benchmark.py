@@ -0,0 +1,93 @@
+''' Helpers for measuring how long things take, and for checking that the
+    faster ways of doing things behave like the slower ones.
+
+    Usage:
+        >>> import_time('tc.utils')
+        0.0012...
+        >>> print_dict(import_times(['tc.utils', 'tc.comics', 'tc.comics_db']))
+        >>> check_execute_moves()
+'''
+import contextlib
+import io
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import timeit
+from typing import Callable, Dict, Iterable
+
+
+def import_time(module: str, repeat=5) -> float:
+    ''' Returns the median time, in seconds, taken to import module in a
+        fresh interpreter, not counting the time the interpreter itself takes
+        to start. '''
+    def run(code: str) -> float:
+        timer = timeit.default_timer
+        start = timer()
+        subprocess.run([sys.executable, '-c', code], check=True)
+        return timer() - start
+
+    baseline = statistics.median(run('pass') for _ in range(repeat))
+    total = statistics.median(run(f'import {module}') for _ in range(repeat))
+    return max(total - baseline, 0.0)
+
+
+def import_times(modules: Iterable[str], repeat=5) -> Dict[str, str]:
+    ''' Returns the import time of each module, formatted in milliseconds. '''
+    return {module: f'{import_time(module, repeat) * 1000:.1f} ms' for module in modules}
+
+
+def import_profile(module: str, top=10) -> Dict[str, str]:
+    ''' Returns the modules that take the longest (cumulatively) to import
+        when importing module in a fresh interpreter, using -X importtime. '''
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            check=True, capture_output=True, text=True)
+
+    entries = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        entries.append((int(cumulative), name.strip()))
+
+    entries.sort(reverse=True)
+    return {name: f'{us / 1000:.1f} ms' for us, name in entries[:top]}
+
+
+def time_function(function: Callable[[], object], repeat=5, number=None) -> float:
+    ''' Returns the best time, in seconds, of a single call to function. '''
+    timer = timeit.Timer(function)
+    if number is None:
+        number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def check_execute_moves(workers=8, count=1000):
+    ''' Raises AssertionError if execute_moves, with several workers, leaves
+        anything other than what moving one at a time would: here, moving
+        count files into a folder that is then renamed, and as many more into
+        it under its new name. '''
+    # not at the top, so that importing this module to time imports stays cheap
+    from .fileutils import execute_moves, plan_moves
+
+    with tempfile.TemporaryDirectory() as root:
+        def path(*parts: str) -> str:
+            return os.path.join(root, *parts)
+
+        os.mkdir(path('author'))
+        names = [f'comic {i}' for i in range(2 * count)]
+        for name in names:
+            open(path(name), 'w').close()
+
+        moves = [(path(name), path('author', name)) for name in names[:count]]
+        moves.append((path('author'), path('renamed')))
+        moves += [(path(name), path('renamed', name)) for name in names[count:]]
+
+        with contextlib.redirect_stderr(io.StringIO()):
+            results = execute_moves(plan_moves(moves), workers=workers)
+
+        assert None not in results, results
+        assert sorted(os.listdir(root)) == ['renamed'], os.listdir(root)
+        assert sorted(os.listdir(path('renamed'))) == sorted(names)
@@ -0,0 +1,258 @@
+''' In-memory LRU caching with optional expiry and persistence, for
+    memoizing functions.
+
+    Usage:
+        @memoize(maxsize=1024, ttl=3600)
+        def lookup(code):
+            ...
+
+        @memoize(persist='lookups.db')  # results survive restarts
+        async def fetch(code):
+            ...
+
+        lookup.cache_info()
+        >>> CacheInfo(hits=10, misses=2, evictions=0, size=2, maxsize=1024)
+'''
+import functools
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional, Tuple
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: Optional[int]
+    weight: float = 0
+    maxweight: Optional[float] = None
+
+
+class LRUCache:
+    ''' A thread-safe cache that evicts its least recently used entries once
+        it holds more than maxsize entries (None for no limit), and treats
+        entries older than ttl seconds (None for no expiry) as missing.
+
+        With maxweight, entries are also evicted once their total weight (as
+        given by weigh(value), such as an estimate of its size in bytes)
+        exceeds it. A value heavier than maxweight is not kept at all. '''
+    maxsize: Optional[int]
+    ttl: Optional[float]
+    maxweight: Optional[float]
+
+    def __init__(self, maxsize: Optional[int] = 128, ttl: Optional[float] = None,
+                 maxweight: Optional[float] = None, weigh: Callable[[Any], float] = lambda value: 1):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self._data: 'OrderedDict[Hashable, Tuple[Any, float, float]]' = OrderedDict()
+        self._weight = 0.0
+        self._lock = threading.RLock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def lookup(self, key: Hashable, count=True) -> Tuple[bool, Any]:
+        ''' Returns (True, value) if key is cached, and (False, None) otherwise.
+            With count=False, the lookup doesn't count towards hits and misses. '''
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+
+            if count:
+                self.record(entry is not None)
+
+            if entry is None:
+                return False, None
+
+            self._data.move_to_end(key)
+            return True, entry[0]
+
+    def set(self, key: Hashable, value: Any):
+        weight = self.weigh(value) if self.maxweight is not None else 0
+        with self._lock:
+            self._remove(key)
+            if self.maxweight is not None and weight > self.maxweight:
+                return
+
+            self._data[key] = (value, time.monotonic(), weight)
+            self._weight += weight
+            while ((self.maxsize is not None and len(self._data) > self.maxsize)
+                   or (self.maxweight is not None and self._weight > self.maxweight)):
+                self._remove(next(iter(self._data)))
+                self._evictions += 1
+
+    def pop(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def _remove(self, key: Hashable):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._weight -= entry[2]
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+
+    def clear(self, stats=True):
+        ''' Removes every entry, and resets the statistics. With stats=False,
+            the statistics are kept. '''
+        with self._lock:
+            self._data.clear()
+            self._weight = 0.0
+            if stats:
+                self._hits = self._misses = self._evictions = 0
+
+    def info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions, len(self._data), self.maxsize,
+                             self._weight, self.maxweight)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.lookup(key, count=False)[0]
+
+
+class SQLiteStore:
+    ''' A persistent store for memoized results in a SQLite file. Keys and
+        values are pickled, and entries of different functions are kept apart
+        by name. '''
+    def __init__(self, path: str, name: str, ttl: Optional[float] = None):
+        self.path = path
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute(
+                '''CREATE TABLE IF NOT EXISTS memoized (
+                       function TEXT, key BLOB, value BLOB, created REAL,
+                       PRIMARY KEY (function, key))'''
+            )
+
+    def lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value, created FROM memoized WHERE function = ? AND key = ?',
+                [self.name, pickle.dumps(key)]
+            ).fetchone()
+
+        if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+            return False, None
+
+        return True, pickle.loads(row[0])
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO memoized (function, key, value, created) VALUES (?, ?, ?, ?)',
+                [self.name, pickle.dumps(key), pickle.dumps(value), time.time()]
+            )
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM memoized WHERE function = ?', [self.name])
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+# marks the start of keyword arguments in a key; a plain value so keys pickle
+_keyword_mark = ('__kwargs__',)
+
+def _make_key(args: tuple, kwargs: dict, typed: bool) -> Hashable:
+    key = args
+    if kwargs:
+        key += _keyword_mark + tuple(kwargs.items())
+    if typed:
+        key += tuple(type(v) for v in args) + tuple(type(v) for v in kwargs.values())
+    return key
+
+
+def memoize(function: Optional[Callable] = None, *, maxsize: Optional[int] = 128,
+            ttl: Optional[float] = None, persist: Optional[str] = None,
+            typed=False) -> Callable:
+    ''' Used as a decorator (with or without arguments): caches the results of
+        a function (or coroutine function) by its arguments, which must be
+        hashable (and picklable, if persisting).
+
+        *maxsize* and *ttl* bound the in-memory cache (see LRUCache). With
+        *persist*, results are also saved to that SQLite file and survive
+        restarts (with the same ttl). With *typed*, arguments of different
+        types (such as 1 and 1.0) are cached separately.
+
+        The decorated function has cache_info() and cache_clear() methods.
+    '''
+    def decorator(function: Callable) -> Callable:
+        cache = LRUCache(maxsize, ttl)
+        store = None
+        if persist is not None:
+            store = SQLiteStore(persist, f'{function.__module__}.{function.__qualname__}', ttl)
+
+        def lookup(key: Hashable) -> Tuple[bool, Any]:
+            found, value = cache.lookup(key, count=False)
+            if not found and store is not None:
+                found, value = store.lookup(key)
+                if found:
+                    cache.set(key, value)
+            cache.record(found)
+            return found, value
+
+        def save(key: Hashable, value: Any):
+            cache.set(key, value)
+            if store is not None:
+                store.set(key, value)
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def memoized(*args, **kwargs):
+                key = _make_key(args, kwargs, typed)
+                found, value = lookup(key)
+                if not found:
+                    value = await function(*args, **kwargs)
+                    save(key, value)
+                return value
+        else:
+            @functools.wraps(function)
+            def memoized(*args, **kwargs):
+                key = _make_key(args, kwargs, typed)
+                found, value = lookup(key)
+                if not found:
+                    value = function(*args, **kwargs)
+                    save(key, value)
+                return value
+
+        def cache_clear():
+            cache.clear()
+            if store is not None:
+                store.clear()
+
+        memoized.cache = cache  # type: ignore
+        memoized.cache_info = cache.info  # type: ignore
+        memoized.cache_clear = cache_clear  # type: ignore
+        return memoized
+
+    if function is None:
+        return decorator
+    return decorator(function)
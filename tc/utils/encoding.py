@@ -0,0 +1,159 @@
+''' Guesses text encodings by scoring candidate decodings on the kinds of
+    characters they produce.
+
+    Text in the right encoding is mostly made of ASCII, kana, common CJK
+    ideographs and CJK punctuation, while mojibake tends to produce
+    replacement characters, control characters, half-width katakana, accented
+    Latin letters and rare ideographs. Long inputs are scored on a few
+    samples instead of in full.
+'''
+import codecs
+import re
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+default_encodings = ('utf-8', 'windows-1252', 'ascii', 'gb2312', 'gb18030',
+                     'shift-jis', 'hz', 'big5')
+
+default_file_encodings = ('utf-8', 'cp932', 'gb18030', 'big5', 'utf-16')
+
+# (pattern, weight per character), roughly ordered by how often they match
+_character_classes: List[Tuple['re.Pattern[str]', float]] = [
+    (re.compile(r'[\x20-\x7e\t\r\n]'), 1.0),  # printable ascii
+    (re.compile(r'[\u3040-\u309f]'), 2.0),  # hiragana
+    (re.compile(r'[\u30a0-\u30ff]'), 1.5),  # katakana
+    (re.compile(r'[\u4e00-\u9fff]'), 1.0),  # cjk ideographs
+    (re.compile(r'[\u3000-\u303f\uff01-\uff5e]'), 1.5),  # cjk punctuation, full-width forms
+    (re.compile('[的一是不了人我在有他这這中大来來上个個们們说說'  # very common ideographs
+                '年日月子出会會時时見见行者事生下自分彼]'), 1.5),
+    (re.compile(r'\ufffd'), -10.0),  # replacement character
+    (re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]'), -5.0),  # control characters
+    (re.compile(r'[\ue000-\uf8ff]'), -5.0),  # private use area
+    (re.compile(r'[\uff61-\uff9f]'), -2.0),  # half-width katakana
+    (re.compile(r'[\u00a0-\u024f]'), -1.5),  # latin-1 supplement, latin extended
+    (re.compile(r'[\u2500-\u25ff\u3400-\u4dbf\uf900-\ufaff]'), -1.5),  # box drawing, rare ideographs
+]
+
+
+class EncodingGuess(NamedTuple):
+    score: float
+    source: Optional[str]
+    target: Optional[str]
+
+
+def score_text(text: str) -> float:
+    ''' Returns how plausible text is as real (as opposed to garbled) text,
+        per character; higher is better. '''
+    if not text:
+        return 0.0
+
+    total = 0.0
+    for pattern, weight in _character_classes:
+        total += weight * len(pattern.findall(text))
+
+    return total / len(text)
+
+
+def rank_reencodings(string: str, encodings: Iterable[str] = default_encodings,
+                     errors='strict', sample_size=4096) -> List[EncodingGuess]:
+    ''' Ranks the ways (wrongly decoded) text could be fixed by encoding it with
+        `source` and decoding it with `target`, most plausible first.
+
+        The unmodified string is also ranked, as source = target = None.
+        With errors='strict', pairs that cannot convert the string are
+        skipped; otherwise they are scored with replacement characters.
+    '''
+    encodings = list(encodings)
+    samples = _sample(string, sample_size, '\n')
+
+    guesses = [EncodingGuess(score_text(''.join(samples)), None, None)]
+
+    for src in encodings:
+        try:
+            encoded = [s.encode(src, errors=errors) for s in samples]
+        except UnicodeError:
+            continue
+
+        for tgt in encodings:
+            if src == tgt:
+                continue
+            try:
+                decoded = ''.join(_decode_sample(e, tgt, errors) for e in encoded)
+            except UnicodeError:
+                continue
+            guesses.append(EncodingGuess(score_text(decoded), src, tgt))
+
+    guesses.sort(key=lambda g: g.score, reverse=True)
+    return guesses
+
+
+def fix_mojibake(string: str, encodings: Iterable[str] = default_encodings) -> str:
+    ''' Returns string, re-encoded in the most plausible way (which may be
+        leaving it unmodified). '''
+    for guess in rank_reencodings(string, encodings):
+        if guess.source is None or guess.target is None:
+            return string
+        try:
+            return string.encode(guess.source).decode(guess.target)
+        except UnicodeError:
+            # the samples converted, but the whole string doesn't
+            continue
+
+    return string
+
+
+def detect_encoding(data: bytes, encodings: Iterable[str] = default_file_encodings,
+                    sample_size=65536) -> Optional[str]:
+    ''' Returns the most plausible encoding of data among encodings, or None
+        if data cannot be decoded with any of them. Ties are won by the
+        encoding listed first. '''
+    samples = _sample(data, sample_size, b'\n')
+
+    best: Optional[str] = None
+    best_score = 0.0
+    for encoding in encodings:
+        try:
+            if _is_wide(encoding):
+                # b'\n' isn't a character boundary in these, and only the
+                # start of data has a byte order mark, so decode it all
+                text = ''.join(_sample(data.decode(encoding), sample_size, '\n'))
+            else:
+                text = ''.join(_decode_sample(s, encoding, 'strict') for s in samples)
+        except (UnicodeError, LookupError):
+            continue
+
+        score = score_text(text)
+        if best is None or score > best_score:
+            best, best_score = encoding, score
+
+    return best
+
+
+def _sample(s, size: int, newline):
+    ''' Returns s, or if s is long, a few slices of s that each start after
+        a newline. For bytes, that is only a character boundary in encodings
+        where b'\n' never occurs inside a character (ASCII-compatible ones,
+        such as UTF-8, Shift-JIS, GB18030 and Big5, but not UTF-16). '''
+    if len(s) <= size:
+        return [s]
+
+    count = 4
+    length = size // count
+    step = len(s) // count
+    samples = [s[:length]]
+    for i in range(1, count):
+        start = s.find(newline, i * step, (i + 1) * step)
+        if start != -1:
+            samples.append(s[start + 1:start + 1 + length])
+    return samples
+
+
+def _is_wide(encoding: str) -> bool:
+    try:
+        return codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32'))
+    except LookupError:
+        return False
+
+
+def _decode_sample(data: bytes, encoding: str, errors: str) -> str:
+    # final=False: a sample may end in the middle of a character
+    return codecs.getincrementaldecoder(encoding)(errors).decode(data, final=False)
@@ -2,12 +2,14 @@ import fnmatch
 import os
 import re
 import sys
-from typing import Any, Iterable, Pattern
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Set, Tuple
 
 from natsort import natsorted
 from send2trash import send2trash
 
 import tc.subfiles
+from .encoding import default_file_encodings, detect_encoding
 
 
 def filesize_format(s: float, readable=True) -> Any:
@@ -266,6 +268,131 @@ def move(
     return target_name
 
 
+def plan_moves(moves: Iterable[Tuple[str, str]], *, auto_rename=True) -> List[Tuple[str, str]]:
+    '''Resolves the targets of several moves, as calling `move(source, name=target)`
+    for each of them in turn would, without moving anything.
+
+    Each target folder is listed at most once, and name collisions, both with
+    existing files and between the moves, are resolved in memory. (A source
+    moved out of a target folder still counts as taking its name there.)
+
+    Returns a list of (source, resolved target).
+    '''
+    taken: Dict[str, Set[str]] = {}
+
+    def names_in(folder: str) -> Set[str]:
+        if folder not in taken:
+            taken[folder] = set(map(os.path.normcase, os.listdir(folder))) if os.path.isdir(folder) else set()
+        return taken[folder]
+
+    def exists(target: str) -> bool:
+        folder, name = os.path.split(target)
+        return os.path.normcase(name) in names_in(folder)
+
+    planned = []
+    for source, target in moves:
+        # don't rename something to itself
+        if os.path.normpath(os.path.normcase(source)) == os.path.normpath(os.path.normcase(target)):
+            planned.append((source, source))
+            continue
+
+        if auto_rename:
+            target = alternative_filename(target, testfunc=exists)
+        folder, name = os.path.split(target)
+        names_in(folder).add(os.path.normcase(name))
+        planned.append((source, target))
+
+    return planned
+
+
+def execute_moves(
+    moves: Iterable[Tuple[str, str]], *,
+    workers=1,
+    makedirs=True,
+    on_moved: Optional[Callable[[str], Any]] = None,
+) -> List[Optional[str]]:
+    '''Performs moves planned by `plan_moves`, in a pool of `workers` threads.
+
+    Moves that depend on each other (whose sources or targets are the same
+    path, or inside one another, such as a move into a folder that is itself
+    moved) are performed one after another, in the order given, as they would
+    be with a single worker.
+
+    Target folders are created beforehand (if `makedirs`), and `on_moved` is
+    called with each target once it is moved.
+
+    Returns the target of each move, or None for moves that failed (the
+    error is printed).
+    '''
+    moves = list(moves)
+
+    if makedirs:
+        for folder in dict.fromkeys(os.path.dirname(target) for _, target in moves):
+            if folder and not os.path.isdir(folder):
+                os.makedirs(folder)
+
+    def execute(move: Tuple[str, str]) -> Optional[str]:
+        source, target = move
+        if source != target:
+            try:
+                os.rename(source, target)
+            except OSError as e:
+                print(f'error: could not move {source} -> {target}: {e}', file=sys.stderr)
+                return None
+            print(f'moved {source} -> {target}', file=sys.stderr)
+
+        if on_moved is not None:
+            on_moved(target)
+        return target
+
+    if workers <= 1:
+        return [execute(move) for move in moves]
+
+    results: List[Optional[str]] = [None] * len(moves)
+
+    def execute_group(group: List[int]):
+        for i in group:
+            results[i] = execute(moves[i])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # list() to raise any exception
+        list(executor.map(execute_group, _dependent_groups(moves)))
+    return results
+
+
+def _dependent_groups(moves: List[Tuple[str, str]]) -> List[List[int]]:
+    ''' Returns the indices of moves, grouped (in order) so that moves whose
+        paths are the same, or inside one another, are in the same group. '''
+    parents = list(range(len(moves)))
+
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    users: Dict[str, int] = {}
+    for i, move in enumerate(moves):
+        for path in move:
+            path = os.path.normcase(os.path.abspath(path))
+            if path in users:
+                parents[find(i)] = find(users[path])
+            users[path] = i
+
+    # a path inside another is only found by walking up from it
+    for path, i in users.items():
+        parent = os.path.dirname(path)
+        while parent != path:
+            if parent in users:
+                parents[find(i)] = find(users[parent])
+            path, parent = parent, os.path.dirname(parent)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(moves)):
+        groups.setdefault(find(i), []).append(i)
+    return list(groups.values())
+
+
 def rename(file_or_folder: str, name: str, *, auto_rename=True) -> str:
     '''Renames a file or folder.
 
@@ -320,6 +447,20 @@ def listdir(path=os.path.curdir) -> list[str]:
     return natsorted(os.listdir(path))
 
 
+def user_cache_dir(*parts: str) -> str:
+    ''' Returns (creating it if needed) a folder for caches, under
+        %LOCALAPPDATA%\\tc on Windows and $XDG_CACHE_HOME/tc (by default
+        ~/.cache/tc) elsewhere. '''
+    if sys.platform == 'win32' and 'LOCALAPPDATA' in os.environ:
+        base = os.environ['LOCALAPPDATA']
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+
+    path = os.path.join(base, 'tc', *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
 _default_preprocess = {
     '*': ' ',
     '"': '\'',
@@ -346,25 +487,50 @@ def sanitize_filename(
     return sanitized
 
 
-def reencode(file: str, source='cp932', dest='utf-8'):
-    with open(file, encoding=dest) as infile:
-        try:
-            infile.read()
-            print('File already in ' + dest + ' encoding', file=sys.stderr)
-            return
-        except UnicodeDecodeError:
-            pass
-    with open(file, encoding=source) as infile:
-        try:
-            contents = infile.read()
-        except UnicodeDecodeError:
-            print('File could not be read as ' + source)
+def reencode(file: str, source='cp932', dest='utf-8', encodings=default_file_encodings):
+    ''' Re-encodes a file from source to dest, keeping the original file as
+        file + '.backup'. With source='auto', the source encoding is guessed
+        from the file's contents among encodings (see tc.utils.encoding). '''
+    with open(file, 'rb') as infile:
+        data = infile.read()
+
+    try:
+        data.decode(dest)
+        print('File already in ' + dest + ' encoding', file=sys.stderr)
+        return
+    except UnicodeDecodeError:
+        pass
+
+    if source == 'auto':
+        detected = detect_encoding(data, [e for e in encodings if e != dest])
+        if detected is None:
+            print('Could not detect the encoding of ' + file)
             return
+        source = detected
+
+    try:
+        contents = data.decode(source)
+    except UnicodeDecodeError:
+        print('File could not be read as ' + source)
+        return
+
+    # as if read in text mode: translate newlines
+    contents = contents.replace('\r\n', '\n').replace('\r', '\n')
+
     os.rename(file, file + '.backup')
     with open(file, 'w', encoding=dest) as outfile:
         outfile.write(contents)
 
 
+def reencode_all(root=os.path.curdir, extensions=('.txt', '.lrc'), source='auto',
+                 dest='utf-8', encodings=default_file_encodings):
+    ''' Re-encodes every file in root and its subdirectories whose extension
+        is in extensions; see reencode. '''
+    for file in tc.subfiles.get_elements(root, filter=lambda f: f.lower().endswith(tuple(extensions))):
+        if os.path.isfile(file):
+            reencode(file, source, dest, encodings)
+
+
 common_image_extensions = frozenset((
     '.png', '.bmp', '.gif', '.heic', '.heif', '.j2k', '.jfi', '.jfif', '.jif',
     '.jp2', '.jpe', '.jpeg', '.jpf', '.jpg', '.jpm', '.jpx', '.mj2', '.tif',
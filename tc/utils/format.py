@@ -1,4 +1,8 @@
-from typing import Any, Optional, Sequence, Union
+import reprlib
+import shutil
+import sys
+import unicodedata
+from typing import Any, Iterable, Iterator, Optional, Sequence, TextIO, Union
 
 
 def format_dict(d: dict) -> str:
@@ -13,22 +17,51 @@ def format_dict(d: dict) -> str:
                           item
             }
     '''
-    s = '{\n'
-    for key, value in d.items():
-        key_string = f'    {key}: '
+    return '\n'.join(format_dict_lines(d))
 
-        if isinstance(value, list):
-            value_string = format_list(value, indent=len(key_string))
-        else:
-            value_string = '\n'.join(' ' * len(key_string) + line for line in str(value).splitlines())
 
+def format_dict_lines(d: dict, max_items: Optional[int] = None,
+                      max_value_length: Optional[int] = None) -> Iterator[str]:
+    ''' Lazily generates the lines of format_dict(d).
 
-        s += key_string + value_string.lstrip() + '\n'
-    s += '}'
-    return s
+        If given, *max_items* limits how many items of the dictionary (and of
+        each list inside it) are shown, and *max_value_length* limits how many
+        characters of each value are shown; nested values are then formatted
+        with reprlib, so that huge values are never formatted in full.
+    '''
+    yield '{'
+    for n, (key, value) in enumerate(d.items()):
+        if max_items is not None and n >= max_items:
+            yield f'    ... ({len(d) - n} more)'
+            break
 
+        key_string = f'    {key}: '
+        indent = ' ' * len(key_string)
 
-def print_dict(d: dict):
+        if isinstance(value, list):
+            lines = format_list_lines(value, indent=len(key_string), max_items=max_items,
+                                      max_repr_length=max_value_length)
+        else:
+            lines = (indent + line for line in _str(value, max_value_length).splitlines())
+
+        # equivalent to lstrip()-ing the joined lines
+        first = True
+        for line in lines:
+            if first:
+                line = line.lstrip()
+                if line == '':
+                    continue
+                line = key_string + line
+                first = False
+            yield line
+
+        if first:
+            yield key_string
+    yield '}'
+
+
+def print_dict(d: dict, max_items: Optional[int] = None,
+               max_value_length: Optional[int] = None, paged=False):
     ''' Prints a dictionary with a more beautiful format.
         input:
             {'key': 'item', 'otherkey': 'multiline\nitem'}
@@ -38,41 +71,65 @@ def print_dict(d: dict):
                 otherkey: multiline
                           item
             }
+        Lines are printed as they are formatted; see format_dict_lines for
+        *max_items* and *max_value_length*, and page for *paged*.
     '''
-    print(format_dict(d))
+    _print_lines(format_dict_lines(d, max_items, max_value_length), paged)
 
 
 def format_list(l: list, indent=0, fold_at=78, single_line_at=18) -> str:
-    if len(l) <= 1:
-        return repr(l)
+    return '\n'.join(format_list_lines(l, indent, fold_at, single_line_at))
 
-    reprs = [repr(x) for x in l]
 
-    if max(len(x) for x in reprs) > single_line_at:
-        lines = reprs
-    else:
-        lines = [reprs[0]]
+def format_list_lines(l: list, indent=0, fold_at=78, single_line_at=18,
+                      max_items: Optional[int] = None,
+                      max_repr_length: Optional[int] = None) -> Iterator[str]:
+    ''' Lazily generates the lines of format_list(l, indent, fold_at, single_line_at).
 
-        for x in reprs[1:]:
-            if len(lines[-1]) + len(x) > fold_at - indent - 2:
-                lines.append(x)
-            else:
-                lines[-1] += ', ' + x
+        If given, only the first *max_items* items are formatted, and each
+        item's repr is limited to around *max_repr_length* characters.
+    '''
+    if len(l) <= 1:
+        yield _repr(l, max_repr_length)
+        return
 
-    if len(lines) == 1:
-        lines = ['[' + lines[0] + ']']
-    else:
-        lines = [
-            '[' + lines[0] + ',',
-            *(' ' + x + ',' for x in lines[1:-1]),
-            ' ' + lines[-1] + ']'
-        ]
+    items = l if max_items is None else l[:max_items]
+    reprs = [_repr(x, max_repr_length) for x in items]
+    if len(items) < len(l):
+        reprs.append(f'... ({len(l) - len(items)} more)')
 
-    return '\n'.join(' ' * indent + line for line in lines)
+    if max(len(x) for x in reprs) > single_line_at:
+        folded: Iterable[str] = reprs
+    else:
+        folded = _fold(reprs, fold_at - indent - 2)
+
+    # we only know which line is the last one once we've seen the next one
+    prefix = ' ' * indent
+    lines = iter(folded)
+    previous = next(lines)
+    opening = '['
+    for line in lines:
+        yield prefix + opening + previous + ','
+        opening = ' '
+        previous = line
+
+    yield prefix + opening + previous + ']'
+
+
+def _fold(reprs: list[str], width: int) -> Iterator[str]:
+    line = reprs[0]
+    for x in reprs[1:]:
+        if len(line) + len(x) > width:
+            yield line
+            line = x
+        else:
+            line += ', ' + x
+    yield line
 
 
-def print_list(l: list):
-    print(format_list(l))
+def print_list(l: list, max_items: Optional[int] = None,
+               max_repr_length: Optional[int] = None, paged=False):
+    _print_lines(format_list_lines(l, max_items=max_items, max_repr_length=max_repr_length), paged)
 
 
 def format_table(
@@ -91,6 +148,19 @@ def format_table(
         {0: 1, 3: 1, 'default': 5} -> [1, 5, 5, 1]
     (not implemented here due to questions about its intuitive-ness)
     '''
+    return '\n'.join(format_table_lines(t, max_width, spacing))
+
+
+def format_table_lines(
+    t: list[list[Any]],
+    max_width: Optional[Union[int, list[int]]] = None,
+    spacing: Union[int, list[int]] = 1
+) -> Iterator[str]:
+    ''' Lazily generates the lines of format_table(t, max_width, spacing).
+
+        Column widths depend on every row, so the cells are still converted to
+        strings up front, but each row is only formatted once it is needed.
+    '''
 
     # A. Input Validation
 
@@ -98,7 +168,7 @@ def format_table(
     t = [[str(c) for c in r] for r in t]
 
     if len(t) == 0:
-        return ''
+        return
 
     columns = len(t[0])
 
@@ -115,8 +185,8 @@ def format_table(
     if len(spacing) != columns - 1:
         raise ValueError(f'max_width: excepted {columns - 1} items, got {len(spacing)}')
 
-    # a shortcut
-    spacing.append(0)
+    # a shortcut (on a copy, so we don't modify the caller's list)
+    spacing = spacing + [0]
 
     # B. Input Processing
     widths = [0] * columns
@@ -131,20 +201,74 @@ def format_table(
     # widths = [max(len(row[i]) for row in t) for i in range(columns)]
 
     # C. Formatting
-    # this list comprehension:
+    # this generator expression:
     # 1. formats each string in the list to be exactly widths[i] chars long
     # 2. appends spacing[i] spaces to the end
-    t = [[f'{c:{widths[i]}}' + ' ' * spacing[i] for i, c in enumerate(r)] for r in t]
-
-    return '\n'.join(''.join(col for col in row) for row in t)
+    for r in t:
+        yield ''.join(f'{c:{widths[i]}}' + ' ' * spacing[i] for i, c in enumerate(r))
 
 
 def print_table(
     t: list[list[Any]],
     max_width: Optional[Union[int, list[int]]] = None,
-    spacing: Union[int, list[int]] = 1
+    spacing: Union[int, list[int]] = 1,
+    paged=False
 ):
-    print(format_table(t, max_width, spacing))
+    _print_lines(format_table_lines(t, max_width, spacing), paged)
+
+
+def page(lines: Iterable[str], page_size: Optional[int] = None, file: Optional[TextIO] = None):
+    ''' Prints lines one page at a time, waiting for enter to be pressed
+        between pages (entering 'q' stops printing). page_size defaults to
+        the height of the terminal. When not printing to an interactive
+        terminal, all lines are printed without pausing. '''
+    if file is None:
+        file = sys.stdout
+
+    interactive = file.isatty() and sys.stdin.isatty()
+    if page_size is None:
+        # leaving a line for the prompt, on terminals of any (even no) height
+        page_size = max(1, shutil.get_terminal_size().lines - 1)
+    elif page_size < 1:
+        raise ValueError(f'page_size must be at least 1, not {page_size}')
+
+    for n, line in enumerate(lines, 1):
+        print(line, file=file)
+        if interactive and n % page_size == 0:
+            if input('-- more --').strip().lower() == 'q':
+                return
+
+
+def _print_lines(lines: Iterable[str], paged: bool):
+    if paged:
+        page(lines)
+    else:
+        for line in lines:
+            print(line)
+
+
+def _str(value: Any, max_length: Optional[int]) -> str:
+    if max_length is None:
+        return str(value)
+
+    if isinstance(value, (dict, list, tuple, set, frozenset)):
+        s = _repr(value, max_length)
+    else:
+        s = str(value)
+
+    return s if len(s) <= max_length else s[:max_length] + '...'
+
+
+def _repr(value: Any, max_length: Optional[int]) -> str:
+    if max_length is None:
+        return repr(value)
+
+    r = reprlib.Repr()
+    r.maxstring = r.maxother = max_length
+    r.maxlevel = 3
+    s = r.repr(value)
+
+    return s if len(s) <= max_length else s[:max_length] + '...'
 
 
 def shorten(text: str, length_including_ellipsis=20, fullwidth_aware=True, force_ellipsis=False) -> str:
@@ -159,23 +283,68 @@ def shorten(text: str, length_including_ellipsis=20, fullwidth_aware=True, force
             return text
         return text[:length_before_ellipsis] + '...'
 
-    lengths_from_beginning = [0]
+    return _shorten(text, length_including_ellipsis, force_ellipsis, _char_widths)
 
-    for c in text:
-        if lengths_from_beginning[-1] > length_including_ellipsis:
-            break
 
-        next_length = lengths_from_beginning[-1] + (2 if is_cjk_fullwidth(c, True) else 1)
-        lengths_from_beginning.append(next_length)
+def shorten_many(texts: Iterable[str], length_including_ellipsis=20,
+                 fullwidth_aware=True, force_ellipsis=False) -> list[str]:
+    ''' shortens every string in texts as if by calling shorten on each;
+        the width table is shared between all strings, so for long listings
+        the width of each distinct character is only computed once '''
+    if not fullwidth_aware:
+        return [shorten(text, length_including_ellipsis, False, force_ellipsis) for text in texts]
+
+    widths = _char_widths
+    return [_shorten(text, length_including_ellipsis, force_ellipsis, widths) for text in texts]
+
 
-    if not force_ellipsis and lengths_from_beginning[-1] <= length_including_ellipsis:
+def _shorten(text: str, length_including_ellipsis: int, force_ellipsis: bool, widths: dict[str, int]) -> str:
+    length_before_ellipsis = length_including_ellipsis - 3
+
+    # every ascii character is one column wide
+    if text.isascii():
+        if not force_ellipsis and len(text) <= length_including_ellipsis:
+            return text
+        return text[:max(length_before_ellipsis, 0)] + '...'
+
+    # a single pass: cut is the end of the longest prefix that still fits before
+    # the ellipsis, and we stop as soon as the text is known to be too long
+    width = 0
+    cut = 0
+    for i, c in enumerate(text):
+        width += widths[c]
+        if width > length_including_ellipsis:
+            return text[:cut] + '...'
+        if width <= length_before_ellipsis:
+            cut = i + 1
+
+    if not force_ellipsis:
         return text
 
-    for i, l in enumerate(lengths_from_beginning):
-        if l > length_before_ellipsis:
-            return text[:i-1] + '...'
+    return text[:cut] + '...'
+
+
+def char_width(char: str) -> int:
+    ''' Returns the number of columns char takes up in a terminal: 0 for
+        combining marks and other zero-width characters (such as joiners and
+        variation selectors), 2 for wide and full-width characters, including
+        CJK characters and most emoji, and 1 otherwise. '''
+    if unicodedata.combining(char) or unicodedata.category(char) in ('Mn', 'Me', 'Cf'):
+        return 0
+    if unicodedata.east_asian_width(char) in ('W', 'F'):
+        return 2
+    return 1
+
+
+class _WidthTable(dict):
+    ''' A table of character widths, filled in as characters are seen. '''
+    def __missing__(self, char: str) -> int:
+        width = char_width(char)
+        self[char] = width
+        return width
+
 
-    return text + '...'
+_char_widths = _WidthTable()
 
 
 def is_cjk_fullwidth(char: str, check_fully=False):
@@ -0,0 +1,240 @@
+''' Records timed spans of function calls into a fixed-size ring buffer.
+
+    Tracing is disabled by default (set the environment variable TC_TRACE to
+    enable it on import, or call enable()), and a disabled traced function
+    costs a single attribute check per call.
+
+    Usage:
+        @traced
+        def slow(n):
+            ...
+
+        enable()
+        slow(1)
+        print_dict(tracer.summary())
+        tracer.dump('trace.json')  # open in chrome://tracing or Perfetto
+'''
+import functools
+import json
+import os
+import reprlib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional
+
+
+class Span(NamedTuple):
+    name: str
+    start: int  # time.perf_counter_ns() at entry
+    duration: int  # in nanoseconds
+    thread: int
+    args: Optional[str]
+
+
+class LatencyHistogram:
+    ''' A histogram of durations with power-of-two buckets: bucket i counts
+        durations of less than 2 ** i microseconds (and at least half that). '''
+    buckets = 40
+
+    def __init__(self):
+        self.counts = [0] * LatencyHistogram.buckets
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+
+    def add(self, duration: int):
+        ''' Adds a duration, in nanoseconds. '''
+        bucket = min((duration // 1000).bit_length(), LatencyHistogram.buckets - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    def percentile(self, p: float) -> Optional[float]:
+        ''' Returns an upper bound, in milliseconds, on the p-th percentile (0 - 100). '''
+        if self.count == 0:
+            return None
+
+        target = self.count * p / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return min(2 ** i / 1000, self.max / 1e6)  # type: ignore
+
+        return self.max / 1e6  # type: ignore
+
+    def to_dict(self) -> Dict[str, Any]:
+        ''' Summarizes the histogram; all times are in milliseconds. '''
+        if self.count == 0:
+            return {'count': 0}
+
+        return {
+            'count': self.count,
+            'total': self.total / 1e6,
+            'mean': self.total / self.count / 1e6,
+            'min': self.min / 1e6,  # type: ignore
+            'max': self.max / 1e6,  # type: ignore
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': {f'<{2 ** i}us': c for i, c in enumerate(self.counts) if c > 0},
+        }
+
+
+class Tracer:
+    ''' Collects spans into a ring buffer holding the latest `capacity` spans,
+        and keeps a latency histogram for every span name (which, unlike the
+        ring buffer, covers every span since the last clear()). '''
+    enabled: bool
+    spans: Deque[Span]
+    histograms: Dict[str, LatencyHistogram]
+
+    def __init__(self, capacity=10000, enabled=False):
+        self.enabled = enabled
+        self.spans = deque(maxlen=capacity)
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def record(self, name: str, start: int, duration: int, args: Optional[str] = None):
+        self.spans.append(Span(name, start, duration, threading.get_ident(), args))
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(duration)
+
+    @contextmanager
+    def span(self, name: str, args: Optional[str] = None) -> Iterator[None]:
+        ''' Records the body of a `with` statement as a span. '''
+        if not self.enabled:
+            yield
+            return
+
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter_ns() - start, args)
+
+    def traced(self, function: Optional[Callable] = None, *,
+               name: Optional[str] = None, record_args=False) -> Callable:
+        ''' Used as a decorator (with or without arguments): records calls to
+            the function as spans named after its qualified name.
+
+            With record_args=True, a short summary of the arguments is kept
+            with each span; it is only computed while tracing is enabled. '''
+        def decorator(function: Callable) -> Callable:
+            span_name = name or function.__qualname__
+
+            @functools.wraps(function)
+            def traced_function(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+
+                start = time.perf_counter_ns()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    self.record(span_name, start, time.perf_counter_ns() - start,
+                                _summarize(args, kwargs) if record_args else None)
+            return traced_function
+
+        if function is None:
+            return decorator
+        return decorator(function)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+            self.histograms = {}
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        ''' Returns the latency histogram of every span name, slowest (by
+            total time) first. '''
+        with self._lock:
+            histograms = list(self.histograms.items())
+
+        histograms.sort(key=lambda item: item[1].total, reverse=True)
+        return {name: histogram.to_dict() for name, histogram in histograms}
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'spans': [
+                {
+                    'name': s.name,
+                    'start': (s.start - self._origin) / 1e6,
+                    'duration': s.duration / 1e6,
+                    'thread': s.thread,
+                    'args': s.args
+                } for s in list(self.spans)
+            ],
+            'histograms': self.summary()
+        }
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        ''' Returns the spans in Chrome's trace event format. '''
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = []
+        for s in list(self.spans):
+            event = {
+                'name': s.name,
+                'cat': 'tc',
+                'ph': 'X',
+                'ts': (s.start - self._origin) / 1000,
+                'dur': s.duration / 1000,
+                'pid': pid,
+                'tid': s.thread,
+            }
+            if s.args is not None:
+                event['args'] = {'args': s.args}
+            events.append(event)
+
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump(self, path: str, format='chrome'):
+        ''' Writes the trace to a file; format is 'chrome' or 'json'. '''
+        if format == 'chrome':
+            data = self.to_chrome_trace()
+        elif format == 'json':
+            data = self.to_json()
+        else:
+            raise ValueError("format must be 'chrome' or 'json'")
+
+        with open(path, 'w', encoding='utf-8') as outfile:
+            json.dump(data, outfile, ensure_ascii=False)
+
+
+_summary_repr = reprlib.Repr()
+_summary_repr.maxstring = 40
+_summary_repr.maxother = 40
+_summary_repr.maxlevel = 1
+
+def _summarize(args: tuple, kwargs: dict) -> str:
+    return ', '.join(
+        [_summary_repr.repr(arg) for arg in args] +
+        [key + '=' + _summary_repr.repr(arg) for key, arg in kwargs.items()]
+    )
+
+
+tracer = Tracer(enabled=bool(os.environ.get('TC_TRACE')))
+traced = tracer.traced
+span = tracer.span
+
+
+def enable(capacity: Optional[int] = None):
+    ''' Enables the default tracer, optionally resizing its ring buffer. '''
+    if capacity is not None:
+        tracer.spans = deque(tracer.spans, maxlen=capacity)
+    tracer.enabled = True
+
+
+def disable():
+    tracer.enabled = False
@@ -1,8 +1,185 @@
+import bisect
+import functools
 import inspect
+import math
 import os.path
+from typing import Iterable, Iterator, List, Optional, Tuple
 
+from .encoding import default_encodings, rank_reencodings
 
-class Limit:
+
+class IntervalSet:
+    ''' A set of numbers made of sorted, disjoint intervals, each bounds
+        inclusive, where the first lower bound and the last upper bound may
+        be unbounded (None); and of arithmetic progressions (ranges with a
+        step other than 1), which are kept as ranges rather than expanded.
+
+        Membership tests are a binary search over the intervals, followed by
+        a check of each progression, and the overall bounds of the set are
+        available in constant time.
+
+        Usage:
+            >>> s = IntervalSet([(0, 2), (5, None)])
+            >>> 1 in s, 3 in s, 100 in s
+            (True, False, True)
+            >>> IntervalSet.from_range(range(0, 10, 3)) | Limit(2, 3)
+            IntervalSet([(2, 3)], [range(0, 10, 3)])
+            >>> 10**9 - 2 in IntervalSet.from_range(range(0, 10**9, 2))
+            True
+    '''
+    _lowers: List[float]
+    _uppers: List[float]
+    _progressions: List[range]
+
+    def __init__(self, intervals: Iterable[Tuple[Optional[float], Optional[float]]] = (),
+                 progressions: Iterable[range] = ()):
+        bounds = [
+            (-math.inf if lower is None else lower, math.inf if upper is None else upper)
+            for lower, upper in intervals
+        ]
+        steps = []
+        for r in progressions:
+            if len(r) == 0:
+                continue
+            if r.step < 0:
+                r = r[::-1]
+            if len(r) == 1 or r.step == 1:
+                bounds.append((r[0], r[-1]))
+            else:
+                steps.append(range(r[0], r[-1] + 1, r.step))
+
+        self._lowers = []
+        self._uppers = []
+        for lower, upper in sorted(bounds):
+            if lower > upper:
+                continue
+            if self._uppers and _touches(self._uppers[-1], lower):
+                self._uppers[-1] = max(self._uppers[-1], upper)
+            else:
+                self._lowers.append(lower)
+                self._uppers.append(upper)
+
+        # progressions lying within a single interval add nothing
+        self._progressions = sorted(
+            {r for r in steps if not self._covers(r[0], r[-1])},
+            key=lambda r: (r.start, r.step, r.stop)
+        )
+
+    @classmethod
+    def from_range(cls, r: range) -> 'IntervalSet':
+        ''' Returns the set of numbers in a range. '''
+        return cls(progressions=[r])
+
+    def _covers(self, lower: float, upper: float) -> bool:
+        ''' Whether lower and upper lie within the same interval. '''
+        i = bisect.bisect_right(self._lowers, lower) - 1
+        return i >= 0 and upper <= self._uppers[i]
+
+    def __contains__(self, number) -> bool:
+        return self._covers(number, number) or any(_in_progression(number, r) for r in self._progressions)
+
+    def __iter__(self) -> Iterator[Tuple[Optional[float], Optional[float]]]:
+        ''' Iterates through the intervals, as (lower, upper) tuples; the
+            progressions are in `progressions`. '''
+        for lower, upper in zip(self._lowers, self._uppers):
+            yield (None if lower == -math.inf else lower, None if upper == math.inf else upper)
+
+    @property
+    def progressions(self) -> List[range]:
+        ''' The progressions, as ranges with a positive step. '''
+        return list(self._progressions)
+
+    def __bool__(self) -> bool:
+        return len(self._lowers) > 0 or len(self._progressions) > 0
+
+    def __repr__(self) -> str:
+        if self._progressions:
+            return f'IntervalSet({list(self)!r}, {self._progressions!r})'
+        return f'IntervalSet({list(self)!r})'
+
+    def union(self, other: 'IntervalSet') -> 'IntervalSet':
+        return IntervalSet(list(self) + list(other), self._progressions + other._progressions)
+
+    def intersection(self, other: 'IntervalSet') -> 'IntervalSet':
+        result = []
+        i = j = 0
+        while i < len(self._lowers) and j < len(other._lowers):
+            lower = max(self._lowers[i], other._lowers[j])
+            upper = min(self._uppers[i], other._uppers[j])
+            if lower <= upper:
+                result.append((lower, upper))
+            if self._uppers[i] < other._uppers[j]:
+                i += 1
+            else:
+                j += 1
+
+        progressions = [
+            _clip(r, lower, upper)
+            for a, b in ((self, other), (other, self))
+            for r in a._progressions
+            for lower, upper in zip(b._lowers, b._uppers)
+        ]
+        progressions += [_common(r, s) for r in self._progressions for s in other._progressions]
+        return IntervalSet(result, progressions)
+
+    __or__ = union
+    __and__ = intersection
+
+    @property
+    def min(self) -> Optional[float]:
+        ''' The smallest number in the set; None if unbounded or empty. '''
+        lowers = self._lowers[:1] + [r[0] for r in self._progressions]
+        if not lowers or self._lowers[:1] == [-math.inf]:
+            return None
+        return min(lowers)
+
+    @property
+    def max(self) -> Optional[float]:
+        ''' The largest number in the set; None if unbounded or empty. '''
+        uppers = self._uppers[-1:] + [r[-1] for r in self._progressions]
+        if not uppers or self._uppers[-1:] == [math.inf]:
+            return None
+        return max(uppers)
+
+
+def _touches(upper: float, lower: float) -> bool:
+    ''' Whether an interval ending at upper and the next one starting at
+        lower can be merged; integer intervals merge when they are adjacent. '''
+    if lower <= upper:
+        return True
+    return isinstance(upper, int) and isinstance(lower, int) and lower == upper + 1
+
+
+def _in_progression(number, r: range) -> bool:
+    # not `number in r`, which counts through r for anything but an int
+    return r[0] <= number <= r[-1] and (number - r[0]) % r.step == 0
+
+
+def _clip(r: range, lower: float, upper: float) -> range:
+    ''' Returns the members of r (with a positive step) from lower to upper. '''
+    start = r.start
+    if lower > start:
+        start += -((start - math.ceil(lower)) // r.step) * r.step
+    stop = r.stop if upper >= r[-1] else math.floor(upper) + 1
+    return range(start, max(start, stop), r.step)
+
+
+def _common(r: range, s: range) -> range:
+    ''' Returns the members of both r and s (with positive steps). '''
+    gcd = math.gcd(r.step, s.step)
+    if (s.start - r.start) % gcd:
+        return range(0)
+    step = r.step // gcd * s.step
+    # the first member of r that's also congruent to s.start modulo s.step
+    k = (s.start - r.start) // gcd * pow(r.step // gcd, -1, s.step // gcd) % (s.step // gcd)
+    first = r.start + k * r.step
+    lower = max(r.start, s.start)
+    if first < lower:
+        first += (lower - first + step - 1) // step * step
+    return range(first, max(first, min(r.stop, s.stop)), step)
+
+
+class Limit(IntervalSet):
     ''' The limit object provides the ability to ask if a number is an
         a range. Upper and lower bound inclusive.
 
@@ -10,15 +187,34 @@ class Limit:
             >>> l = Limit(lower=10).
             >>> 5 in l == False
             >>> 50 in l == True
+
+        Limits are interval sets (see IntervalSet), and can be combined with
+        | and & into sets of several intervals.
     '''
 
     def __init__(self, lower=0, upper=None):
-        self.lower = lower
-        self.upper = upper
+        super().__init__([(lower, upper)])
+        self._lower = lower
+        self._upper = upper
+
+    @property
+    def lower(self):
+        return self._lower
 
-    def __contains__(self, number):
-        return ((self.lower is None or self.lower <= number) and
-                (self.upper is None or self.upper >= number))
+    @lower.setter
+    def lower(self, value):
+        self.__init__(value, self._upper)
+
+    @property
+    def upper(self):
+        return self._upper
+
+    @upper.setter
+    def upper(self, value):
+        self.__init__(self._lower, value)
+
+    def __repr__(self) -> str:
+        return f'Limit(lower={self.lower!r}, upper={self.upper!r})'
 
 
 def __localfile(path: str) -> str:
@@ -54,6 +250,7 @@ def __trace(show_arguments=False, show_return=False):
             >>> > hello :  'John'
                 < Hello -> 'Hello, John!'
         '''
+        @functools.wraps(function)
         def traced(*args, **kwargs):
             entry = '> ' + function.__name__
             if show_arguments:
@@ -82,19 +279,19 @@ def simple_trace(function):
     return __trace()(function)
 
 
-_default_encodings = ('utf-8', 'windows-1252', 'ascii', 'gb2312', 'gb18030',
-                      'shift-jis', 'hz', 'big5')
-def encoding_analysis(string: str, encodings=_default_encodings, show_errors=True):
+def encoding_analysis(string: str, encodings=default_encodings, show_errors=True, top=None):
     ''' Attempts to convert (wrongly encoded) text from one encoding to another,
-        printing the results of all of the attempts. '''
-    for src in encodings:
-        for tgt in encodings:
-            if src != tgt:
-                if show_errors:
-                    result = string.encode(src, errors='replace').decode(tgt, errors='replace')
-                else:
-                    try:
-                        result = string.encode(src).decode(tgt)
-                    except UnicodeError:
-                        continue
-                print(f'{src} -> {tgt}:\n\t{result}')
+        printing the results of the attempts, most plausible first (see
+        tc.utils.encoding.rank_reencodings; use fix_mojibake to just get the
+        best result). *top* limits how many results are printed. '''
+    errors = 'replace' if show_errors else 'strict'
+    guesses = rank_reencodings(string, encodings, errors=errors)
+
+    for guess in guesses[:top]:
+        if guess.source is None or guess.target is None:
+            continue
+        try:
+            result = string.encode(guess.source, errors=errors).decode(guess.target, errors=errors)
+        except UnicodeError:
+            continue
+        print(f'{guess.source} -> {guess.target} ({guess.score:.2f}):\n\t{result}')
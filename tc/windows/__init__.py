@@ -1 +1,10 @@
-from .display import set_resolution, current_resolution
+from typing import TYPE_CHECKING
+
+from tc._lazy import lazy_exports
+
+__getattr__, __dir__, __all__ = lazy_exports(globals(), {
+    '.display': ['set_resolution', 'current_resolution'],
+})
+
+if TYPE_CHECKING:
+    from .display import set_resolution, current_resolution